@@ -0,0 +1,63 @@
+'''
+Compares the wall-clock time and the best order found by the search strategies for SARIMAX terms
+on the bundled datasets. Run it from the root folder of the project:
+
+    python benchmarks/search_strategies.py
+'''
+import numpy as np
+import os
+import pandas as pd
+import sys
+import time
+import warnings
+
+sys.path.insert(0, 'lib/')
+warnings.filterwarnings('ignore')
+
+from grid_search_arima import grid_search_arima
+from halving_search_arima import halving_search_arima
+from stepwise_search_arima import stepwise_search_arima
+
+# Frequency and seasonality for each bundled dataset, based on the prefix of the file name
+frequencies = {'daily': ('D', 7),
+               'monthly': ('MS', 12),
+               'yearly': ('AS', 5)}
+
+def load_dataset(filename):
+    df = pd.read_csv(os.path.join('datasets', filename), index_col=0)
+    freq, seasonality = frequencies[filename.split('_')[0]]
+    df.index = pd.to_datetime(df.index)
+    return np.log1p(df.iloc[:, 0].asfreq(freq)), seasonality
+
+def time_strategy(search_function, *args, **kwargs):
+    start = time.time()
+    best_model_order = search_function(*args, **kwargs)
+    return time.time() - start, best_model_order
+
+if __name__ == '__main__':
+    results = []
+    for filename in sorted(os.listdir('datasets')):
+        if not filename.endswith('.csv'):
+            continue
+        ts, seasonality = load_dataset(filename)
+        ranges = (range(3), range(3), range(2), range(2))
+
+        exhaustive_time, exhaustive_order = time_strategy(grid_search_arima, ts, None, *ranges, d=1, D=1, s=seasonality)
+        halving_time, halving_order = time_strategy(halving_search_arima, ts, None, *ranges, d=1, D=1, s=seasonality, quiet=True)
+        stepwise_time, stepwise_order = time_strategy(stepwise_search_arima, ts, None, (1, 1, 0, 0), d=1, D=1, s=seasonality,
+                                                      max_terms=tuple(len(terms) - 1 for terms in ranges), quiet=True)
+
+        results.append({'dataset': filename,
+                        'exhaustive (s)': exhaustive_time,
+                        'halving (s)': halving_time,
+                        'stepwise (s)': stepwise_time,
+                        'exhaustive order': exhaustive_order,
+                        'halving order': halving_order,
+                        'stepwise order': stepwise_order,
+                        'halving same order': exhaustive_order == halving_order,
+                        'stepwise same order': exhaustive_order == stepwise_order})
+
+    results = pd.DataFrame(results).set_index('dataset')
+    print(results.to_string())
+    print('\nHalving found the same best order on {:.0%} of the datasets'.format(results['halving same order'].mean()))
+    print('Stepwise found the same best order on {:.0%} of the datasets'.format(results['stepwise same order'].mean()))
@@ -0,0 +1,82 @@
+import numpy as np
+
+from fast_decomposition import fast_decompose
+
+# Critical value at 5% of the KPSS test for level stationarity (Kwiatkowski et al., 1992)
+KPSS_CRITICAL_VALUE = 0.463
+
+# Seasonal strength above which a seasonal difference is needed (Wang, Smith and Hyndman, 2006)
+SEASONAL_STRENGTH_THRESHOLD = 0.64
+
+def kpss_statistic(x):
+    '''
+    KPSS statistic for level stationarity, with the short Newey-West bandwidth, trunc(4 * (n / 100)^{1/4}).
+    Large values reject the null hypothesis of stationarity
+
+    Args:
+        x (Numpy Array): the time series
+    Return:
+        statistic (float): the KPSS statistic
+    '''
+    nobs = len(x)
+    residuals = x - x.mean()
+    eta = np.sum(np.cumsum(residuals) ** 2) / nobs ** 2
+
+    # Long run variance with Bartlett weights
+    lags = min(int(4 * (nobs / 100.) ** 0.25), nobs - 1)
+    long_run_variance = np.dot(residuals, residuals) / nobs
+    for lag in range(1, lags + 1):
+        weight = 1. - lag / (lags + 1.)
+        long_run_variance += 2 * weight * np.dot(residuals[lag:], residuals[:-lag]) / nobs
+    if long_run_variance <= 0:
+        return np.inf
+    return eta / long_run_variance
+
+def seasonal_strength(x, seasonality):
+    '''
+    Strength of the seasonality of a time series, based on a classical additive decomposition. It's 1 minus the variance
+    of the remainder divided by the variance of the seasonal component plus the remainder, limited to [0, 1]
+
+    Args:
+        x (Numpy Array): the time series
+        seasonality (int): the seasonal frequency
+    Return:
+        strength (float): the seasonal strength. It's 0 if the series is too short to be decomposed
+    '''
+    if seasonality < 2 or len(x) < 2 * seasonality + 1:
+        return 0.
+
+    trend, seasonal, remainder = fast_decompose(x, seasonality)
+    detrended = x - trend
+    detrended_variance = np.nanvar(detrended)
+    if detrended_variance == 0:
+        return 0.
+    return max(0., 1. - np.nanvar(remainder) / detrended_variance)
+
+def auto_difference(x, seasonality, max_d=2, max_D=1):
+    '''
+    Finds the amount of differences needed to make a time series stationary. The seasonal differences are chosen
+    first, while the seasonal strength is above SEASONAL_STRENGTH_THRESHOLD, and then the first differences, while
+    the KPSS test rejects stationarity. Each order is tested on the differenced series of the previous order
+
+    Args:
+        x (Pandas Series, Numpy Array, iterable): the time series
+        seasonality (int): the seasonal frequency
+        max_d (int): maximum amount of differences
+        max_D (int): maximum amount of seasonal differences
+    Return:
+        differenced (Numpy Array): the differenced time series
+        d (int): the amount of differences
+        D (int): the amount of seasonal differences
+    '''
+    differenced = np.asarray(x, dtype=float)
+    D = 0
+    while D < max_D and len(differenced) > 2 * seasonality and seasonal_strength(differenced, seasonality) > SEASONAL_STRENGTH_THRESHOLD:
+        differenced = differenced[seasonality:] - differenced[:-seasonality]
+        D += 1
+
+    d = 0
+    while d < max_d and len(differenced) > 2 and kpss_statistic(differenced) > KPSS_CRITICAL_VALUE:
+        differenced = np.diff(differenced)
+        d += 1
+    return differenced, d, D
@@ -0,0 +1,51 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+# Streamlit runs the script again on every interaction, but the modules are imported only once per server process,
+# hence, the searches started here keep running (and can be found again) between the runs of the script.
+# A single thread runs the searches one at a time, since each search already uses all the selected CPU cores
+background_executor = ThreadPoolExecutor(max_workers=1)
+background_jobs = {}
+background_jobs_lock = threading.Lock()
+
+def running_job(key):
+    '''
+    Finds a job that was started and didn't finish yet
+
+    Args:
+        key (hashable): the key used to start the job
+    Return:
+        job (Future): the job, or None if there is no job running (or waiting to run) with this key
+    '''
+    with background_jobs_lock:
+        return background_jobs.get(key)
+
+def forget_job(key, job):
+    # Finished jobs are removed, so only the running jobs are kept in memory
+    with background_jobs_lock:
+        if background_jobs.get(key) is job:
+            del background_jobs[key]
+
+def run_in_background(key, function, *args, **kwargs):
+    '''
+    Runs a function (e.g. grid_search_arima with quiet=True) on a background thread, outside of the Streamlit script.
+    If a job with the same key is still running, it's returned instead of starting a new one. The jobs are forgotten
+    when they finish, so their results must be stored somewhere else (e.g. the checkpoint of the search)
+
+    Args:
+        key (hashable): identifies the job between the runs of the script (e.g. the checkpoint of a search)
+        function (func): the function to run. It must not call Streamlit
+        args, kwargs: the arguments of the function
+    Return:
+        job (Future): the job. Use job.done() to check if it finished
+    '''
+    with background_jobs_lock:
+        job = background_jobs.get(key)
+        if job is not None:
+            return job
+        job = background_executor.submit(function, *args, **kwargs)
+        background_jobs[key] = job
+    # The callback runs right away if the job already finished, so it's added without holding the lock
+    job.add_done_callback(lambda finished_job: forget_job(key, finished_job))
+    return job
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+from concurrent.futures import ProcessPoolExecutor
+
+def rolling_origins(nobs, horizon, n_folds, step=None, min_train_size=None):
+    '''
+    Positions of the forecast origins of a rolling-origin backtest. The last fold ends on the last observation, and each
+    previous fold starts step observations earlier
+
+    Args:
+        nobs (int): amount of observations of the time series
+        horizon (int): amount of periods forecasted from each origin
+        n_folds (int): maximum amount of folds
+        step (int, optional): distance between consecutive origins. By default, the horizon (folds don't overlap)
+        min_train_size (int, optional): minimum amount of observations before the first origin. By default, twice the horizon
+    Return:
+        origins (list): the positions of the first forecasted observation of each fold, from the oldest to the newest
+    '''
+    step = step if step is not None else horizon
+    min_train_size = min_train_size if min_train_size is not None else 2 * horizon
+    origins = [nobs - horizon - step * i for i in range(n_folds)][::-1]
+    origins = [origin for origin in origins if origin >= min_train_size]
+    if len(origins) == 0:
+        raise ValueError('The time series is too short for a backtest with a horizon of {} periods'.format(horizon))
+    return origins
+
+def build_model(endog, exog, order, seasonal_order):
+    return sm.tsa.statespace.SARIMAX(endog,
+                                     order=order,
+                                     exog=exog,
+                                     seasonal_order=seasonal_order,
+                                     enforce_invertibility=False)
+
+def forecast_fold(job):
+    '''
+    Fits (or filters, if the parameters are fixed) a model on the train window of a fold and forecasts its horizon.
+    It's a module level function, so the folds can run on worker processes
+
+    Args:
+        job (tuple): endog and exog (Numpy Arrays, exog can be None) of the train window, exog of the horizon, order,
+            seasonal order, horizon, and the fixed parameters (or None to fit them)
+    Return:
+        forecasts (Numpy Array): the forecasts of the horizon, or NaN if the model could not be fitted
+    '''
+    endog, exog, horizon_exog, order, seasonal_order, horizon, params = job
+    try:
+        mod = build_model(endog, exog, order, seasonal_order)
+        results = mod.filter(params) if params is not None else mod.fit(disp=False)
+        return np.asarray(results.forecast(horizon, exog=horizon_exog))
+    except Exception:
+        return np.full(horizon, np.nan)
+
+def backtest_arima(Y, order, seasonal_order, horizon, n_folds=5, step=None, window='expanding', exog=None, params=None,
+                   n_jobs=1, min_train_size=None, inverse_transformation=None):
+    '''
+    Rolling-origin backtest of a SARIMAX model. Each fold trains on the observations before its origin (all of them on an
+    expanding window, or a fixed amount on a sliding window), and forecasts the next horizon periods.
+
+    With fixed parameters, the folds only run the Kalman filter instead of estimating the parameters again. On an
+    expanding window the time series is filtered once, and each fold forecasts from the state predicted at its origin
+
+    Args:
+        Y (Pandas Series): the time series
+        order (tuple): the (p, d, q) terms of the model
+        seasonal_order (tuple): the (P, D, Q, s) terms of the model
+        horizon (int): amount of periods forecasted from each origin
+        n_folds (int): maximum amount of folds
+        step (int, optional): distance between consecutive origins. By default, the horizon
+        window (str): expanding or sliding
+        exog (Pandas DataFrame, optional): exogenous variables of the time series
+        params (Numpy Array, optional): fixed parameters of the model (e.g. fitted on the train set). If None, the
+            parameters are fitted on each fold
+        n_jobs (int): amount of worker processes used to run the folds. If 1, the folds run sequentially
+        min_train_size (int, optional): minimum amount of observations before the first origin
+        inverse_transformation (func, optional): a function applied to the observations and the forecasts before
+            computing the errors (e.g. transformationPair.inverse), so they are in the original scale
+    Return:
+        errors (Pandas DataFrame): the forecast errors (forecast - actual) with one row per fold, indexed by its origin,
+            and one column per forecasted period (1 to horizon)
+    '''
+    if window not in ['expanding', 'sliding']:
+        raise ValueError('window must be expanding or sliding')
+    values = np.asarray(Y, dtype=float)
+    exog_values = np.asarray(exog, dtype=float) if exog is not None else None
+    origins = rolling_origins(len(values), horizon, n_folds, step, min_train_size)
+    starts = [0 if window == 'expanding' else origin - origins[0] for origin in origins]
+
+    def horizon_exog(origin):
+        return exog_values[origin:origin + horizon] if exog_values is not None else None
+
+    if params is not None and window == 'expanding':
+        # The predicted states of a single filter are the states of the filters of all the expanding windows
+        results = build_model(values, exog_values, order, seasonal_order).filter(params)
+        forecasts = []
+        for origin in origins:
+            # Missing observations make the filter forecast the horizon from the state predicted at the origin
+            mod = build_model(np.full(horizon, np.nan), horizon_exog(origin), order, seasonal_order)
+            mod.ssm.initialize_known(results.filter_results.predicted_state[:, origin],
+                                     results.filter_results.predicted_state_cov[:, :, origin])
+            forecasts.append(np.asarray(mod.filter(params).filter_results.forecasts[0]))
+    else:
+        jobs = [(values[start:origin], exog_values[start:origin] if exog_values is not None else None, horizon_exog(origin),
+                 order, seasonal_order, horizon, params) for start, origin in zip(starts, origins)]
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(jobs))) as executor:
+                forecasts = list(executor.map(forecast_fold, jobs))
+        else:
+            forecasts = [forecast_fold(job) for job in jobs]
+
+    forecasts = np.vstack(forecasts)
+    actual_values = np.vstack([values[origin:origin + horizon] for origin in origins])
+    if inverse_transformation is not None:
+        forecasts = np.asarray(inverse_transformation(forecasts), dtype=float)
+        actual_values = np.asarray(inverse_transformation(actual_values), dtype=float)
+
+    index = Y.index[origins] if isinstance(Y, pd.Series) else pd.Index(origins)
+    errors = pd.DataFrame(forecasts - actual_values, index=index, columns=np.arange(1, horizon + 1))
+    errors.index.name = 'origin'
+    errors.columns.name = 'horizon'
+    return errors
+
+class backtestScorer:
+    '''
+    Scoring function of grid_search_arima based on a rolling-origin backtest of each candidate on its training data.
+    By default, the folds reuse the parameters of the fitted candidate and only run the Kalman filter, which is much
+    cheaper than fitting the candidate on each fold (refit=True). Instances can be sent to worker processes
+    '''
+    def __init__(self, horizon, n_folds=3, step=None, window='expanding', refit=False, metric='RMSE'):
+        '''
+        Args:
+            horizon, n_folds, step, window: see backtest_arima
+            refit (bool): whether or not to fit the parameters on each fold
+            metric (str): RMSE or MAE of all the forecast errors of the backtest
+        '''
+        if metric not in ['RMSE', 'MAE']:
+            raise ValueError('metric must be RMSE or MAE')
+        self.horizon = horizon
+        self.n_folds = n_folds
+        self.step = step
+        self.window = window
+        self.refit = refit
+        self.metric = metric
+
+    def __call__(self, train_data, exog, model):
+        '''
+        Args:
+            train_data (Pandas Series): the training data of the candidate
+            exog (Pandas DataFrame): exogenous variables of the candidate, or None
+            model (Statsmodels SARIMAX results): the fitted candidate
+        Return:
+            score (float): the backtest error of the candidate (lower is better), or infinite if it can't be computed
+        '''
+        params = None if self.refit else np.asarray(model.params)
+        errors = backtest_arima(train_data, model.model.order, model.model.seasonal_order, self.horizon, self.n_folds,
+                                self.step, self.window, exog=exog, params=params).values
+        if np.all(np.isnan(errors)):
+            return np.inf
+        if self.metric == 'MAE':
+            return float(np.nanmean(np.abs(errors)))
+        return float(np.sqrt(np.nanmean(errors ** 2)))
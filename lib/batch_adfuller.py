@@ -0,0 +1,90 @@
+import numpy as np
+
+from statsmodels.regression.linear_model import OLS
+from statsmodels.tsa.adfvalues import mackinnoncrit, mackinnonp
+from statsmodels.tsa.stattools import adfuller
+from statsmodels.tsa.tsatools import add_trend, lagmat
+
+def batch_adfuller(x, maxlag=None, regression='c', autolag='AIC'):
+    '''
+    Augmented Dickey-Fuller test with the same results of statsmodels adfuller, but with a faster lag selection.
+    Instead of fitting one OLS regression for each candidate lag, the design matrix with all the lags is decomposed
+    once (QR), and the sum of squared residuals of every nested regression is read from the decomposition. Only the
+    regression with the selected lag is fitted with OLS, which gives the test statistic
+
+    Args:
+        x (Pandas Series, Numpy Array, iterable): the time series to be tested
+        maxlag (int, optional): maximum lag included in the test. If None, 12*(nobs/100)^{1/4} is used, like in statsmodels
+        regression (str): constant and trend order to include in the regression. It can be c, ct, ctt, or n
+        autolag (str): information criterion used to select the lag. It can be AIC or BIC
+    Return:
+        adfstat (float): the test statistic
+        pvalue (float): MacKinnon's approximate p-value
+        usedlag (int): the amount of lags used
+        nobs (int): the amount of observations used in the regression
+        critvalues (dict): critical values for the test statistic at the 1%, 5%, and 10% levels
+        icbest (float): the information criterion of the selected lag
+    '''
+    x = np.asarray(x, dtype=float)
+    if autolag is None or autolag.lower() not in ('aic', 'bic'):
+        raise ValueError('autolag must be AIC or BIC')
+    if x.max() == x.min():
+        raise ValueError('Invalid input, x is constant')
+
+    nobs = x.shape[0]
+    ntrend = len(regression) if regression != 'n' else 0
+    if maxlag is None:
+        maxlag = int(np.ceil(12.0 * np.power(nobs / 100.0, 1 / 4.0)))
+        maxlag = min(nobs // 2 - ntrend - 1, maxlag)
+        if maxlag < 0:
+            raise ValueError('sample size is too short to use selected regression component')
+    elif maxlag > nobs // 2 - ntrend - 1:
+        raise ValueError('maxlag must be less than (nobs/2 - 1 - ntrend) where n trend is the number of included deterministic regressors')
+
+    xdiff = np.diff(x)
+    xdall = lagmat(xdiff[:, None], maxlag, trim='both', original='in')
+    nobs = xdall.shape[0]
+    xdall[:, 0] = x[-nobs - 1:-1]
+    xdshort = xdiff[-nobs:]
+    full_rhs = add_trend(xdall, regression, prepend=True) if regression != 'n' else xdall
+    startlag = full_rhs.shape[1] - xdall.shape[1] + 1
+
+    # Decomposing the regressors and the target together: the last column of R has the projections of the target
+    # on each regressor, and its last element is the norm of the residuals of the regression with all the lags
+    r = np.linalg.qr(np.column_stack([full_rhs, xdshort]), mode='r')
+    ncolumns = full_rhs.shape[1]
+    diagonal = np.abs(np.diag(r)[:ncolumns])
+    if diagonal.min() <= diagonal.max() * max(full_rhs.shape) * np.finfo(float).eps:
+        # Collinear regressors have a reduced rank, which statsmodels takes into account in the criteria
+        return adfuller(x, maxlag=maxlag, regression=regression, autolag=autolag)
+
+    # Sum of squared residuals of the regressions with the first k columns, for k from startlag to all columns
+    squared_projections = r[:ncolumns, -1] ** 2
+    ssr = r[-1, -1] ** 2 + np.cumsum(squared_projections[::-1])[::-1]
+    ssr = np.append(ssr, r[-1, -1] ** 2)[startlag:]
+    nparams = np.arange(startlag, ncolumns + 1)
+
+    llf = -nobs / 2. * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1)
+    penalty = 2. if autolag.lower() == 'aic' else np.log(nobs)
+    criteria = -2 * llf + penalty * nparams
+
+    # Ties are resolved by the smallest lag, like in statsmodels
+    best = int(np.argmin(criteria))
+    icbest = criteria[best]
+    usedlag = best
+
+    # Fitting the regression with the selected lag, using all the observations it allows
+    xdall = lagmat(xdiff[:, None], usedlag, trim='both', original='in')
+    nobs = xdall.shape[0]
+    xdall[:, 0] = x[-nobs - 1:-1]
+    xdshort = xdiff[-nobs:]
+    if regression != 'n':
+        resols = OLS(xdshort, add_trend(xdall[:, :usedlag + 1], regression)).fit()
+    else:
+        resols = OLS(xdshort, xdall[:, :usedlag + 1]).fit()
+
+    adfstat = resols.tvalues[0]
+    pvalue = mackinnonp(adfstat, regression=regression, N=1)
+    critvalues = mackinnoncrit(N=1, regression=regression, nobs=nobs)
+    critvalues = {'1%': critvalues[0], '5%': critvalues[1], '10%': critvalues[2]}
+    return adfstat, pvalue, usedlag, nobs, critvalues, icbest
@@ -0,0 +1,107 @@
+import ast
+import csv
+import heapq
+import numpy as np
+import os
+import pandas as pd
+import threading
+
+# Searches running on different threads (e.g. on the background) might append to the same log
+log_lock = threading.Lock()
+
+class candidatesStore:
+    '''
+    Keeps the records of the best candidates of a Grid Search in a fixed-size heap, so its memory doesn't grow with the
+    size of the grid. Optionally, every record is also appended to a CSV log on the disk, which keeps the full history
+    of the search without holding it in memory, and can be read back to resume it.
+    '''
+    def __init__(self, top_k=20, log_path=None):
+        '''
+        Args:
+            top_k (int): amount of best candidates kept in memory
+            log_path (str, optional): path of the CSV file where all the records are appended. The file is created if
+                it doesn't exist
+        '''
+        if top_k < 1:
+            raise ValueError('top_k must be at least 1')
+        self.top_k = top_k
+        self.log_path = log_path
+        self.heap = []
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, record, rank, log=True):
+        '''
+        Stores the record of a candidate. If the heap is full, the worst candidate is dropped
+
+        Args:
+            record (dict): the record of the candidate (see candidate_record)
+            rank (float): the value used to rank the candidate (lower is better). NaN is ranked last
+            log (bool): whether or not to append the record to the log. Records read from the log aren't appended again
+        '''
+        rank = np.inf if rank is None or np.isnan(rank) else rank
+        # The heap keeps the worst candidate on top. Between candidates with the same rank, the newest is the worst,
+        # so the grid order is kept
+        entry = (-rank, -self.count, record)
+        self.count += 1
+        if len(self.heap) < self.top_k:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+
+        if self.log_path is not None and log:
+            self.append_to_log(record)
+
+    def append_to_log(self, record):
+        '''
+        Appends a record to the CSV log. The header is written only on a new file
+        '''
+        folder = os.path.dirname(self.log_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        row = {key: str(value) if isinstance(value, tuple) else value for key, value in record.items()}
+        with log_lock:
+            write_header = not os.path.exists(self.log_path) or os.path.getsize(self.log_path) == 0
+            if not write_header:
+                # A row half written when the process stopped is ended, so the new row starts on its own line
+                with open(self.log_path, 'rb+') as log_file:
+                    log_file.seek(-1, os.SEEK_END)
+                    if log_file.read(1) != b'\n':
+                        log_file.write(b'\n')
+            pd.DataFrame([row]).to_csv(self.log_path, mode='a', header=write_header, index=False)
+
+    def load_log(self):
+        '''
+        Reads the records of the CSV log, e.g. to resume a search that was stopped
+
+        Return:
+            records (dict): the records on the log, keyed by their terms. Rows that can't be read (e.g. a row half written
+                when the process stopped) are skipped
+        '''
+        records = {}
+        if self.log_path is None or not os.path.exists(self.log_path):
+            return records
+        with open(self.log_path, newline='') as log_file:
+            for row in csv.DictReader(log_file):
+                try:
+                    order = tuple(ast.literal_eval(row.pop('order')))
+                    record = {key: float(value) if value != '' else np.nan for key, value in row.items()}
+                except (ValueError, SyntaxError, TypeError, AttributeError):
+                    continue
+                records[order] = dict(order=order, **record)
+        return records
+
+    def table(self):
+        '''
+        Return:
+            candidates (Pandas DataFrame): the records of the best candidates, from the best to the worst, indexed by
+                their terms
+        '''
+        records = [record for _, _, record in sorted(self.heap, reverse=True)]
+        if len(records) == 0:
+            return pd.DataFrame()
+        candidates = pd.DataFrame(records).set_index('order')
+        candidates.index = [str(order) for order in candidates.index]
+        return candidates
@@ -0,0 +1,220 @@
+import csv
+import hashlib
+import os
+import pandas as pd
+
+try:
+    import pyarrow as arrow
+    import pyarrow.csv as arrow_csv
+    import pyarrow.feather as feather
+    import pyarrow.ipc as arrow_ipc
+except ImportError:
+    # Without pyarrow the datasets are always parsed from the original files
+    feather = None
+
+# The cache is shared by the Streamlit app and the upload API, so its folder doesn't depend on the working directory
+COLUMNAR_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.arauto_cache', 'datasets')
+
+# Amount of bytes read to find the delimiter and the encoding of a file
+SNIFF_SIZE = 64 * 1024
+
+# Columnar copies that could not be written, so the conversion of the same version of a file is not tried again
+failed_conversions = set()
+
+def is_delimited_file(file_path):
+    return str.lower(file_path.split('.')[-1]) in ['csv', 'txt']
+
+def is_excel_file(file_path):
+    return str.lower(file_path.split('.')[-1]) in ['xls', 'xlsx']
+
+def sniff_csv_format(file_path):
+    '''
+    Finds the delimiter and the encoding of a delimited file by reading only its first bytes
+
+    Args:
+        file_path (str): the path of the file
+    Return:
+        delimiter (str): the delimiter of the columns
+        encoding (str): the encoding of the file, utf-8 or latin1
+    '''
+    with open(file_path, 'rb') as delimited_file:
+        sample = delimited_file.read(SNIFF_SIZE)
+
+    try:
+        text = sample.decode('utf-8')
+        encoding = 'utf-8'
+    except UnicodeDecodeError as error:
+        # The sample might end in the middle of a multi-byte character
+        if error.start >= len(sample) - 3:
+            text = sample[:error.start].decode('utf-8')
+            encoding = 'utf-8'
+        else:
+            text = sample.decode('latin1')
+            encoding = 'latin1'
+
+    # Only complete lines are used to find the delimiter
+    if len(sample) == SNIFF_SIZE and '\n' in text:
+        text = text[:text.rindex('\n')]
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=',;\t|').delimiter
+    except csv.Error:
+        delimiter = ','
+    return delimiter, encoding
+
+def is_columnar_available():
+    return feather is not None
+
+def columnar_path(file_path):
+    '''
+    Generates the path of the columnar copy of a dataset. The name is based on the path, the size, and the modification
+    time of the original file, so a changed file never matches an old copy
+
+    Args:
+        file_path (str): the path of the original dataset
+    Return:
+        path (str): the path of the Feather file
+    '''
+    status = os.stat(file_path)
+    source = hashlib.sha256(os.path.abspath(file_path).encode()).hexdigest()[:32]
+    version = hashlib.sha256('{}-{}'.format(status.st_mtime_ns, status.st_size).encode()).hexdigest()[:16]
+    return os.path.join(COLUMNAR_FOLDER, '{}-{}.feather'.format(source, version))
+
+def parse_date_columns(df):
+    '''
+    Converts the text columns that only contain dates to datetime columns, so the dates are parsed only once, when the
+    columnar copy is written
+    '''
+    for column in df.columns[df.dtypes == object]:
+        try:
+            df[column] = pd.to_datetime(df[column])
+        except (TypeError, ValueError, OverflowError):
+            pass
+    return df
+
+def remove_old_versions(path):
+    '''
+    Removes the columnar copies of the older versions of the same file
+    '''
+    source = os.path.basename(path).split('-')[0]
+    for filename in os.listdir(COLUMNAR_FOLDER):
+        if filename.startswith(source + '-') and filename != os.path.basename(path):
+            try:
+                os.remove(os.path.join(COLUMNAR_FOLDER, filename))
+            except OSError:
+                pass
+
+def write_columnar(file_path, df):
+    '''
+    Writes a parsed dataset to a Feather file and removes the copies of older versions of the same file
+
+    Args:
+        file_path (str): the path of the original dataset
+        df (Pandas DataFrame): the parsed dataset
+    Return:
+        path (str): the path of the Feather file, or None if pyarrow is not installed or the dataset could not be written
+    '''
+    if feather is None:
+        return None
+
+    path = columnar_path(file_path)
+    os.makedirs(COLUMNAR_FOLDER, exist_ok=True)
+    try:
+        # Writing on a temporary file first, so a copy is never read half written
+        temporary_path = path + '.tmp'
+        feather.write_feather(parse_date_columns(df.copy()).reset_index(drop=True), temporary_path, compression='uncompressed')
+        os.replace(temporary_path, path)
+    except Exception:
+        # Columns with mixed types can't be stored in Arrow, so these datasets are always parsed from the original file
+        failed_conversions.add(path)
+        return None
+
+    remove_old_versions(path)
+    return path
+
+def convert_delimited_file(file_path, delimiter=',', encoding='utf-8'):
+    '''
+    Streams a delimited file into a Feather file, one block of lines at a time, so the whole dataset is never loaded
+    in memory. The types of the columns (including the ISO dates) are inferred by Arrow on the first block
+
+    Args:
+        file_path (str): the path of the original dataset
+        delimiter (str): the delimiter of the columns
+        encoding (str): the encoding of the file
+    Return:
+        path (str): the path of the Feather file, or None if pyarrow is not installed or the dataset could not be
+            converted (e.g. a column whose type changes after the first block). A failed conversion is not tried again
+    '''
+    if feather is None:
+        return None
+    path = columnar_path(file_path)
+    if path in failed_conversions:
+        return None
+
+    os.makedirs(COLUMNAR_FOLDER, exist_ok=True)
+    temporary_path = path + '.tmp'
+    try:
+        reader = arrow_csv.open_csv(file_path, read_options=arrow_csv.ReadOptions(encoding=encoding),
+                                    parse_options=arrow_csv.ParseOptions(delimiter=delimiter))
+        # Text that is not valid in the encoding is read as bytes, so the file is parsed by Pandas instead
+        if any(arrow.types.is_binary(field.type) for field in reader.schema):
+            raise ValueError('The file contains text that is not valid {}'.format(encoding))
+        # Feather files are Arrow IPC files, so the blocks are written as they are read
+        with arrow_ipc.new_file(temporary_path, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+        os.replace(temporary_path, path)
+    except Exception:
+        failed_conversions.add(path)
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        return None
+
+    remove_old_versions(path)
+    return path
+
+def convert_dataset(file_path):
+    '''
+    Stores a dataset in a columnar format (Feather). The next reads of the dataset memory map the Feather file instead
+    of parsing the text again. The original file is kept as the source of truth: when it changes, it's converted again.
+    Delimited files are streamed into the Feather file, so they are never loaded in memory at once. Excel files can't be
+    streamed, so they are only converted when they are uploaded
+
+    Args:
+        file_path (str): the path of the dataset
+    Return:
+        path (str): the path of the Feather file, or None if the dataset could not be converted
+    '''
+    if is_delimited_file(file_path):
+        delimiter, encoding = sniff_csv_format(file_path)
+        return convert_delimited_file(file_path, delimiter, encoding)
+    elif is_excel_file(file_path):
+        return write_columnar(file_path, pd.read_excel(file_path))
+    return None
+
+def read_columnar(file_path, columns=None, nrows=None):
+    '''
+    Reads the columnar copy of a dataset. The Feather file is memory mapped and only the selected columns are loaded
+
+    Args:
+        file_path (str): the path of the original dataset
+        columns (list, optional): the columns to read. If None, all the columns are read
+        nrows (int, optional): amount of lines to read. If None, all the lines are read
+    Return:
+        df (Pandas DataFrame): the dataset, or None if there is no up-to-date copy of the file
+    '''
+    if feather is None:
+        return None
+    path = columnar_path(file_path)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    except Exception:
+        return None
+    if nrows is not None:
+        table = table.slice(0, nrows)
+    # The dates inferred by Arrow are converted to datetime columns, like the ones parsed by Pandas
+    return table.to_pandas(date_as_object=False)
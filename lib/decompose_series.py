@@ -1,15 +1,19 @@
 import matplotlib.pyplot as plt
 import streamlit as st
 
-from pandas import infer_freq
-from statsmodels.tsa.seasonal import seasonal_decompose
+from fast_decomposition import fast_decompose, minmax_downsample
 
-def decompose_series(ts):
+def decompose_series(ts, seasonality, robust_iterations=0, max_points=2000):
     '''
-    This function applies a seasonal decomposition to a time series. It will generate a season plot, a trending plot, and, finally, a resid plot
+    This function applies a seasonal decomposition to a time series. It will generate a season plot, a trending plot, and, finally, a resid plot.
+    Long time series are downsampled before plotting, keeping the minimum and the maximum of each bin of observations
 
     Args.
         ts (Pandas Series): a time series to be decomposed
+        seasonality (int): the seasonal period of the time series
+        robust_iterations (int): amount of robustness iterations, which down-weight the outliers. If 0, the classical
+            decomposition is used
+        max_points (int): maximum amount of points plotted for each component
     '''
     fig = plt.Figure(figsize=(12,7))
     ax1 = plt.subplot(311)
@@ -17,27 +21,19 @@ def decompose_series(ts):
     ax3 = plt.subplot(313)
 
     try:
-        decomposition = seasonal_decompose(ts)
+        trend, seasonal, resid = fast_decompose(ts.values, seasonality, robust_iterations)
 
-    except AttributeError:
+    except ValueError:
         error_message = '''
-                        Seems that your DATE column is not in a proper format. 
-                        Be sure that it\'s in a valid format for a Pandas to_datetime function.
-                        '''
-        raise AttributeError(error_message)
+                        Your time series is too short to be decomposed.
+                        Be sure that it has at least two complete seasonal cycles ({} observations).
+                        '''.format(2 * seasonality)
+        raise ValueError(error_message)
 
-    decomposition.seasonal.plot(color='green', ax=ax1, title='Seasonality')
-    plt.legend('')
-    #plt.title('Seasonality')
-    #st.pyplot()
+    for ax, component, title in [(ax1, seasonal, 'Seasonality'), (ax2, trend, 'Trending'), (ax3, resid, 'Resid')]:
+        positions = minmax_downsample(component, max_points)
+        ax.plot(ts.index[positions], component[positions], color='green')
+        ax.set_title(title)
 
-    decomposition.trend.plot(color='green', ax=ax2, title='Trending')
-    plt.legend('')
-    #plt.title('Trending')
-    #st.pyplot()
-    
-    decomposition.resid.plot(color='green', ax=ax3, title='Resid')
-    plt.legend('')
-    #plt.title('Resid')
     plt.subplots_adjust(hspace=1)
     st.pyplot()
@@ -0,0 +1,86 @@
+import numpy as np
+
+from fast_acf_pacf import fast_acf
+
+def detect_seasonality(x, max_periods=3, max_candidates=10):
+    '''
+    Detects the seasonal periods of a time series in O(n log n). The peaks of the periodogram (FFT) of the detrended
+    series suggest the candidate periods, which are confirmed, and refined, by a peak of the autocorrelation function
+    around them (Vlachos, Yu and Castelli, 2005). Periods must repeat at least twice in the time series
+
+    Args:
+        x (Pandas Series, Numpy Array, iterable): the time series
+        max_periods (int): maximum amount of periods to return
+        max_candidates (int): amount of periodogram peaks checked with the autocorrelation function
+    Return:
+        periods (list): the detected periods, in amount of observations, from the shortest to the longest. It's empty
+            if no seasonality was found
+    '''
+    x = np.asarray(x, dtype=float)
+    x = x[np.isfinite(x)]
+    nobs = len(x)
+    if nobs < 8:
+        return []
+
+    # Removing the linear trend, which would dominate the low frequencies
+    time = np.arange(nobs)
+    detrended = x - np.polyval(np.polyfit(time, x, 1), time)
+    if np.allclose(detrended, 0):
+        return []
+
+    # Local maxima of the periodogram, from the frequency of two cycles up to the Nyquist frequency
+    power = np.abs(np.fft.rfft(detrended)) ** 2
+    frequencies = np.arange(2, len(power) - 1)
+    peaks = frequencies[(power[frequencies] > power[frequencies - 1]) & (power[frequencies] >= power[frequencies + 1])]
+    peaks = peaks[np.argsort(-power[peaks], kind='stable')][:max_candidates]
+
+    # The periodogram of noise is exponentially distributed around the spectrum, estimated by the median of the octave
+    # around the peak (robust to colored noise). Peaks must be significant at 5%, with the Bonferroni correction
+    power_threshold = np.log(len(power) / .05) / np.log(2)
+    peaks = [frequency for frequency in peaks
+             if power[frequency] > power_threshold * np.median(power[frequency // 2:2 * frequency + 1])]
+
+    max_lag = nobs // 2
+    acf_values = fast_acf(detrended, max_lag)
+    # Significance of the autocorrelations at 5%, with Bartlett's formula for the variance
+    acf_threshold = 1.96 * np.sqrt(np.append(1, 1 + 2 * np.cumsum(acf_values[1:] ** 2)) / nobs)
+
+    candidates = []
+    for frequency in peaks:
+        # A frequency bin covers the periods up to half of the distance to its neighbour bins. The period is the lag
+        # with the highest autocorrelation on this interval
+        lower_lag = max(2, int(round(nobs / (frequency + .5))))
+        upper_lag = min(max_lag - 1, int(round(nobs / (frequency - .5))))
+        if lower_lag > upper_lag:
+            continue
+        lag = lower_lag + int(np.argmax(acf_values[lower_lag:upper_lag + 1]))
+
+        # The autocorrelation must be a significant hill: higher than on the valleys of the cycle, half a period away.
+        # Comparing with the next lags instead would reject the periods tilted by a longer cycle
+        is_hill = acf_values[lag] > max(acf_values[lag - lag // 2], acf_values[min(lag + lag // 2, max_lag)])
+        if is_hill and acf_values[lag] > acf_threshold[lag - 1] and lag not in candidates:
+            candidates.append(lag)
+
+    # Neighbour bins of a long period (or the leakage of a strong peak) confirm lags close to each other, which are the
+    # same period. Only the lag with the highest autocorrelation is kept
+    distinct_candidates = []
+    for lag in sorted(candidates, key=lambda lag: -acf_values[lag]):
+        if all(abs(lag - other) > max(1, 0.05 * max(lag, other)) for other in distinct_candidates):
+            distinct_candidates.append(lag)
+    candidates = distinct_candidates
+
+    def is_multiple(long_period, short_period):
+        multiple = int(round(long_period / short_period))
+        return multiple >= 2 and abs(long_period - multiple * short_period) <= max(1, 0.05 * long_period)
+
+    periods = []
+    for period in candidates:
+        # Multiples of a period are repetitions of its cycle, unless their autocorrelation is higher. Divisors of a period
+        # are its harmonics, unless their autocorrelation is at least half of the period's (e.g. daily cycles of a weekly one)
+        is_repetition = any(is_multiple(period, other) and acf_values[period] <= acf_values[other] for other in candidates)
+        is_harmonic = any(is_multiple(other, period) and acf_values[period] < 0.5 * acf_values[other] for other in candidates)
+        if not is_repetition and not is_harmonic:
+            periods.append(period)
+
+    # The shortest periods come first, since they are the cheapest to model with seasonal terms
+    return sorted(periods)[:max_periods]
@@ -0,0 +1,89 @@
+import numpy as np
+
+from scipy.stats import norm
+
+def levinson_durbin(autocovariances, nlags):
+    '''
+    Solves the Yule-Walker equations of all the orders up to nlags with the Levinson-Durbin recursion, in O(nlags^2)
+
+    Args:
+        autocovariances (Numpy Array): autocovariances from lag 0 to nlags
+        nlags (int): the maximum order
+    Return:
+        pacf_values (Numpy Array): partial autocorrelations from lag 0 to nlags, where the lag k is the last coefficient
+            of the Yule-Walker solution of order k
+    '''
+    pacf_values = np.zeros(nlags + 1)
+    pacf_values[0] = 1.
+    coefficients = np.zeros(0)
+    error = autocovariances[0]
+    for k in range(1, nlags + 1):
+        reflection = (autocovariances[k] - np.dot(coefficients, autocovariances[k - 1:0:-1])) / error
+        coefficients = np.append(coefficients - reflection * coefficients[::-1], reflection)
+        error *= 1. - reflection ** 2
+        pacf_values[k] = reflection
+    return pacf_values
+
+def lagged_sums(x, nlags):
+    '''
+    Sums of the products of the demeaned time series with its lags, for all the lags at once, computed with the FFT in
+    O(n log n). The time series is zero padded, which avoids the circular correlation
+
+    Args:
+        x (Numpy Array): the time series
+        nlags (int): the maximum lag
+    Return:
+        sums (Numpy Array): the sums from lag 0 to nlags
+    '''
+    x = x - x.mean()
+    size = 2 ** int(np.ceil(np.log2(2 * len(x) - 1)))
+    spectrum = np.fft.rfft(x, size)
+    return np.fft.irfft(spectrum * np.conj(spectrum), size)[:nlags + 1]
+
+def fast_acf(x, nlags):
+    '''
+    Computes the autocorrelations of a time series with the FFT. The results are the same of statsmodels acf (unbiased=False)
+
+    Args:
+        x (Pandas Series, Numpy Array, iterable): the time series, without null values
+        nlags (int): the maximum lag
+    Return:
+        acf_values (Numpy Array): autocorrelations from lag 0 to nlags
+    '''
+    sums = lagged_sums(np.asarray(x, dtype=float), nlags)
+    return sums / sums[0]
+
+def fast_acf_pacf(x, nlags):
+    '''
+    Computes the autocorrelations and the partial autocorrelations of a time series in a single pass over the data.
+    The autocovariances are computed with the FFT, in O(n log n), and the partial autocorrelations are derived from
+    them with the Levinson-Durbin recursion. The results are the same of statsmodels acf (unbiased=False) and
+    pacf (method='ywunbiased')
+
+    Args:
+        x (Pandas Series, Numpy Array, iterable): the time series, without null values
+        nlags (int): the maximum lag
+    Return:
+        acf_values (Numpy Array): autocorrelations from lag 0 to nlags
+        pacf_values (Numpy Array): partial autocorrelations from lag 0 to nlags
+        acf_confint (Numpy Array): half width of the 95% confidence interval of each autocorrelation (Bartlett's formula)
+        pacf_confint (float): half width of the 95% confidence interval of the partial autocorrelations
+    '''
+    x = np.asarray(x, dtype=float)
+    nobs = len(x)
+    if nlags >= nobs:
+        raise ValueError('nlags must be smaller than the number of observations')
+    sums = lagged_sums(x, nlags)
+    acf_values = sums / sums[0]
+
+    # The partial autocorrelations use the unbiased autocovariances, except for lag 0
+    unbiased_autocovariances = sums / (nobs - np.arange(nlags + 1))
+    unbiased_autocovariances[0] = sums[0] / nobs
+    pacf_values = levinson_durbin(unbiased_autocovariances, nlags)
+
+    acf_variance = np.ones(nlags + 1) / nobs
+    acf_variance[0] = 0
+    acf_variance[2:] *= 1 + 2 * np.cumsum(acf_values[1:-1] ** 2)
+    acf_confint = norm.ppf(0.975) * np.sqrt(acf_variance)
+    pacf_confint = norm.ppf(0.975) / np.sqrt(nobs)
+    return acf_values, pacf_values, acf_confint, pacf_confint
@@ -0,0 +1,104 @@
+import numpy as np
+
+def moving_average(x, period, weights=None):
+    '''
+    Centered moving average of a time series in O(n), with cumulative sums, whatever the period. An even period uses
+    the average of two consecutive windows (2 x period moving average), like statsmodels seasonal_decompose
+
+    Args:
+        x (Numpy Array): the time series
+        period (int): the size of the window
+        weights (Numpy Array, optional): the weight of each observation. If informed, the average is weighted
+    Return:
+        trend (Numpy Array): the moving average, with the same size of x. The first and the last period // 2 values
+            are NaN, since their windows are incomplete
+    '''
+    half_window = period // 2
+    if weights is None:
+        weights = np.ones(len(x))
+
+    def window_sums(values):
+        # Sums of the windows centered on each valid observation
+        sums = np.concatenate(([0.], np.cumsum(values)))
+        if period % 2 == 1:
+            return sums[period:] - sums[:-period]
+        # Both ends of the even windows have half of the weight
+        full_sums = sums[period + 1:] - sums[:-period - 1]
+        return full_sums - (values[:-period] + values[period:]) / 2.
+
+    trend = np.full(len(x), np.nan)
+    if len(x) > 2 * half_window:
+        trend[half_window:len(x) - half_window] = window_sums(weights * x) / window_sums(weights)
+    return trend
+
+def fast_decompose(x, period, robust_iterations=0):
+    '''
+    Additive seasonal decomposition in O(n). The trend is a centered moving average and the seasonal component is the
+    mean of each position of the seasonal cycle on the detrended series, which are the same results of statsmodels
+    seasonal_decompose. With robust_iterations, the outliers are down-weighted with bisquare weights of the remainder,
+    like the robustness loop of STL, and the components are estimated again
+
+    Args:
+        x (Pandas Series, Numpy Array, iterable): the time series
+        period (int): the seasonal period, in amount of observations
+        robust_iterations (int): amount of robustness iterations. If 0, the decomposition is not robust
+    Return:
+        trend (Numpy Array): the trend component, with NaN on the edges
+        seasonal (Numpy Array): the seasonal component
+        resid (Numpy Array): the remainder, with NaN on the edges
+    '''
+    x = np.asarray(x, dtype=float)
+    if period < 2 or len(x) < 2 * period:
+        raise ValueError('The time series must have at least two complete seasonal cycles ({} observations)'.format(2 * period))
+
+    phases = np.arange(len(x)) % period
+    weights = np.ones(len(x))
+    for iteration in range(robust_iterations + 1):
+        trend = moving_average(x, period, weights)
+        detrended = x - trend
+
+        # Weighted mean of each position of the cycle, ignoring the edges without trend
+        valid = ~np.isnan(detrended)
+        valid_weights = weights * valid
+        seasonal_means = (np.bincount(phases, weights=np.where(valid, detrended, 0.) * valid_weights, minlength=period) /
+                          np.bincount(phases, weights=valid_weights, minlength=period))
+        seasonal = (seasonal_means - seasonal_means.mean())[phases]
+        resid = detrended - seasonal
+
+        if iteration < robust_iterations:
+            absolute_resid = np.abs(resid[valid])
+            scale = 6 * np.median(absolute_resid)
+            if scale == 0:
+                break
+            # Bisquare weights. The edges keep the weights of the previous iteration
+            weights[valid] = np.clip(1 - (absolute_resid / scale) ** 2, 0, None) ** 2
+            # Avoiding windows without any weight
+            weights = np.maximum(weights, 1e-6)
+    return trend, seasonal, resid
+
+def minmax_downsample(x, max_points=2000):
+    '''
+    Downsamples a time series for plotting, keeping the minimum and the maximum of each bin of consecutive
+    observations. The peaks and the valleys remain visible, unlike with a regular sampling
+
+    Args:
+        x (Numpy Array): the time series. NaN values are ignored
+        max_points (int): maximum amount of points to keep
+    Return:
+        positions (Numpy Array): the sorted positions of the kept observations
+    '''
+    nobs = len(x)
+    if nobs <= max_points:
+        return np.arange(nobs)
+
+    bin_size = int(np.ceil(2. * nobs / max_points))
+    n_bins = int(np.ceil(nobs / bin_size))
+    padded = np.full(n_bins * bin_size, np.nan)
+    padded[:nobs] = x
+    bins = padded.reshape(n_bins, bin_size)
+
+    starts = np.arange(n_bins) * bin_size
+    minimums = starts + np.argmin(np.where(np.isnan(bins), np.inf, bins), axis=1)
+    maximums = starts + np.argmax(np.where(np.isnan(bins), -np.inf, bins), axis=1)
+    positions = np.unique(np.concatenate((minimums, maximums)))
+    return positions[~np.isnan(padded[positions])]
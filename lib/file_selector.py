@@ -3,58 +3,148 @@ import pandas as pd
 import requests
 import streamlit as st
 
+from columnar_cache import convert_dataset, is_columnar_available, is_delimited_file, is_excel_file, read_columnar, sniff_csv_format
+
+# Files bigger than this size are read in chunks
+CHUNK_FILE_SIZE = 256 * 1024 ** 2
+CHUNK_ROWS = 1000000
+
+@st.cache(allow_output_mutation=True, show_spinner=False)
+def read_header(file_path, modification_time, nrows=30):
+    '''
+    Reads only the first lines of a delimited or Excel file, which is enough to show the data and to select
+    the columns. The result is cached by Streamlit, so the file is only read again when it's changed on the disk
+
+    Args:
+        file_path (str): the path of the file
+        modification_time (float): the last modification time of the file. It's only used as part of the cache key
+        nrows (int): amount of lines to read
+    Return:
+        df (DataFrame): Pandas DataFrame with the first lines of the dataset, or None if the format is not supported.
+            It's shared between the reruns, so it must not be modified
+    '''
+    df = read_columnar(file_path, nrows=nrows)
+    if df is not None:
+        return df
+
+    if is_delimited_file(file_path):
+        delimiter, encoding = sniff_csv_format(file_path)
+        try:
+            return pd.read_csv(file_path, delimiter=delimiter, encoding=encoding, nrows=nrows)
+        except UnicodeDecodeError:
+            # The encoding is found on the first bytes only, so the next lines might not be utf-8
+            return pd.read_csv(file_path, delimiter=delimiter, encoding='latin1', nrows=nrows)
+    elif is_excel_file(file_path):
+        return pd.read_excel(file_path, nrows=nrows)
+    return None
+
+def read_delimited_file(file_path, usecols=None, dtype=None):
+    '''
+    Reads a delimited file, in chunks if it's bigger than CHUNK_FILE_SIZE
+
+    Args:
+        file_path (str): the path of the file
+        usecols (list, optional): the columns to read. If None, all the columns are read
+        dtype (dict, optional): the type of each column
+    Return:
+        df (DataFrame): Pandas DataFrame with the dataset
+    '''
+    delimiter, encoding = sniff_csv_format(file_path)
+    read_options = {'delimiter': delimiter, 'usecols': usecols, 'dtype': dtype}
+    if os.path.getsize(file_path) > CHUNK_FILE_SIZE:
+        read_options['chunksize'] = CHUNK_ROWS
+
+    def read(encoding):
+        df = pd.read_csv(file_path, encoding=encoding, **read_options)
+        if 'chunksize' in read_options:
+            df = pd.concat(df, ignore_index=True)
+        return df
+
+    try:
+        return read(encoding)
+    except UnicodeDecodeError:
+        # The encoding is found on the first bytes only, so the rest of the file might not be utf-8
+        return read('latin1')
+
+@st.cache(allow_output_mutation=True, show_spinner=False)
+def read_columns(file_path, modification_time, ds_column, columns):
+    '''
+    Reads only the date column and the modeled columns of a dataset. If pyarrow is installed, the columns are
+    read from the columnar copy of the dataset, which is streamed from a delimited file on its first read. Otherwise
+    (or if the file can't be stored in the columnar format), only these columns are parsed from the original file.
+    The modeled columns are read as floats. The result is cached by Streamlit
+
+    Args:
+        file_path (str): the path of the file
+        modification_time (float): the last modification time of the file. It's only used as part of the cache key
+        ds_column (str): the date column
+        columns (tuple): the target and exogenous columns
+    Return:
+        df (DataFrame): Pandas DataFrame with the selected columns. It's shared between the reruns, so it must not be modified
+    '''
+    usecols = [ds_column] + [column for column in columns if column != ds_column]
+
+    df = read_columnar(file_path, columns=usecols)
+    if df is None and is_columnar_available() and is_delimited_file(file_path) and convert_dataset(file_path) is not None:
+        # First read of this version of the file: it was streamed into the columnar format
+        df = read_columnar(file_path, columns=usecols)
+    if df is not None:
+        df = df[usecols]
+        for column in usecols[1:]:
+            try:
+                df[column] = df[column].astype(float)
+            except (TypeError, ValueError):
+                pass
+        return df
+
+    if is_excel_file(file_path):
+        return pd.read_excel(file_path, usecols=usecols)[usecols]
+
+    try:
+        dtypes = {column: float for column in usecols[1:]}
+        dtypes[ds_column] = str
+        df = read_delimited_file(file_path, usecols=usecols, dtype=dtypes)
+    except ValueError:
+        # Columns that are not numbers (e.g. with thousands separators) are read with the default types
+        df = read_delimited_file(file_path, usecols=usecols)
+    return df[usecols]
+
 def file_selector(folder_path='datasets/'):
     '''
-    Selects a CSV file to be used as a dataset for the model
+    Selects a CSV file to be used as a dataset for the model. Only the first lines of the file are read here,
+    the selected columns are read later by read_columns
 
     Args:
         folder_path (str): the absolute path for the directory that contains datasets
     Return:
         OS Path Directory
-        df (DataFrame): Pandas DataFrame with the dataset
+        df (DataFrame): Pandas DataFrame with the first lines of the dataset
     '''
 
     filenames = os.listdir(folder_path)
     filenames.sort()
     default_file_index = filenames.index('monthly_air_passengers.csv') if 'monthly_air_passengers.csv' in filenames else 0
     selected_filename = st.sidebar.selectbox('Select a file', filenames, default_file_index)
-    
-    # Checking if the file is in a valid delimited format
-    if str.lower(selected_filename.split('.')[-1]) in ['csv', 'txt']:
-        try:
-            df = pd.read_csv(os.path.join(folder_path, selected_filename))
-        except pd._libs.parsers.ParserError:
-            try:
-                df = pd.read_csv(os.path.join(folder_path, selected_filename), delimiter=';')
-            except UnicodeDecodeError:
-                df = pd.read_csv(os.path.join(folder_path, selected_filename), delimiter=';', encoding='latin1')
-        except UnicodeDecodeError:
-            try:
-                df = pd.read_csv(os.path.join(folder_path, selected_filename), encoding='latin1')
-            except pd._libs.parsers.ParserError:
-                df = pd.read_csv(os.path.join(folder_path, selected_filename), encoding='latin1', delimiter=';')
 
-    elif str.lower(selected_filename.split('.')[-1]) == 'xls' or str.lower(selected_filename.split('.')[-1]) == 'xlsx':
-        try:
-            df = pd.read_excel(os.path.join(folder_path, selected_filename))
-        except pd._libs.parsers.ParserError:
-            try:
-                df = pd.read_excel(os.path.join(folder_path, selected_filename), delimiter=';')
-            except UnicodeDecodeError:
-                df = pd.read_excel(os.path.join(folder_path, selected_filename), delimiter=';', encoding='latin1')
-        except UnicodeDecodeError:
-            try:
-                df = pd.read_excel(os.path.join(folder_path, selected_filename), encoding='latin1')
-            except pd._libs.parsers.ParserError:
-                df = pd.read_excel(os.path.join(folder_path, selected_filename), encoding='latin1', delimiter=';')
-    else:
-        st.error('This file format is not supported yet')
+    file_path = os.path.join(folder_path, selected_filename)
+    df = read_header(file_path, os.path.getmtime(file_path))
+    if df is None:
+        raise TypeError('This file format is not supported yet')
+
+    # The cached DataFrame is shared between the reruns, so we work on a copy of it
+    return file_path, df.copy()
 
+def check_data_points(df):
+    '''
+    Shows a warning if the dataset is too small to make a prediction
+
+    Args:
+        df (DataFrame): Pandas DataFrame with the dataset
+    '''
     if len(df) < 30:
         data_points_warning = '''
-                              The dataset contains too few data points to make a prediction. 
+                              The dataset contains too few data points to make a prediction.
                               It is recommended to have at least 50 data points, but preferably 100 data points (Box and Tiao 1975).
                               This may lead to inaccurate predictions.
                               '''
         st.warning(data_points_warning)
-    return os.path.join(folder_path, selected_filename), df
\ No newline at end of file
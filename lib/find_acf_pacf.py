@@ -1,8 +1,27 @@
 import matplotlib.pyplot as plt
 import numpy as np
-import statsmodels.api as sm
 import streamlit as st
 
+from fast_acf_pacf import fast_acf_pacf
+
+def plot_correlations(ax, values, confint, title):
+    '''
+    Plots autocorrelations (or partial autocorrelations) already computed, like statsmodels plot_acf and plot_pacf
+
+    Args:
+        ax (Matplotlib Axes): the axes of the plot
+        values (Numpy Array): the correlations from lag 0
+        confint (Numpy Array or float): half width of the confidence interval of each lag
+        title (str): the title of the plot
+    '''
+    lags = np.arange(len(values))
+    ax.vlines(lags, 0, values, color='green')
+    ax.plot(lags, values, 'o', color='green', markersize=5)
+    ax.axhline(0, color='green')
+    confint = np.broadcast_to(confint, values.shape)
+    ax.fill_between(lags[1:], -confint[1:], confint[1:], alpha=.25, linewidth=0)
+    ax.set_title(title)
+
 def find_acf_pacf(timeseries, seasonality):
     '''
     Function to find the amount of terms for p and q
@@ -21,12 +40,14 @@ def find_acf_pacf(timeseries, seasonality):
     P_terms = 0
     Q_terms = 0
 
-    lower_conf_int = -1.96/np.sqrt(len(timeseries.dropna()))
-    upper_conf_int = 1.96/np.sqrt(len(timeseries.dropna()))
-
-    pacf_values = sm.tsa.stattools.pacf(timeseries.dropna(), nlags = seasonality * 2, method='ywunbiased')
+    timeseries = timeseries.dropna()
+    lower_conf_int = -1.96/np.sqrt(len(timeseries))
+    upper_conf_int = 1.96/np.sqrt(len(timeseries))
 
-    acf_values = sm.tsa.stattools.acf(timeseries.dropna(), nlags = seasonality * 2, fft=False, unbiased=False)
+    # The correlations are computed once, and used by both the terms estimation and the plots. Long seasonal
+    # periods might not fit twice in the time series
+    nlags = min(seasonality * 2, len(timeseries) // 2)
+    acf_values, pacf_values, acf_confint, pacf_confint = fast_acf_pacf(timeseries, nlags)
 
     #st.write(pacf_values, lower_conf_int)
 
@@ -45,22 +66,22 @@ def find_acf_pacf(timeseries, seasonality):
             break
 
     # Checking for P terms
-    if pacf_values[seasonality] >= upper_conf_int or pacf_values[seasonality] <= lower_conf_int:
+    if seasonality <= nlags and (pacf_values[seasonality] >= upper_conf_int or pacf_values[seasonality] <= lower_conf_int):
         P_terms += 1
-        if pacf_values[seasonality*2] >= upper_conf_int or pacf_values[seasonality*2] <= lower_conf_int:
+        if seasonality*2 <= nlags and (pacf_values[seasonality*2] >= upper_conf_int or pacf_values[seasonality*2] <= lower_conf_int):
             P_terms += 1
 
     # Checking for Q terms
-    if acf_values[seasonality] >= upper_conf_int or acf_values[seasonality] <= lower_conf_int:
+    if seasonality <= nlags and (acf_values[seasonality] >= upper_conf_int or acf_values[seasonality] <= lower_conf_int):
         Q_terms += 1
-        if acf_values[seasonality*2] >= upper_conf_int or acf_values[seasonality*2] <= lower_conf_int:
+        if seasonality*2 <= nlags and (acf_values[seasonality*2] >= upper_conf_int or acf_values[seasonality*2] <= lower_conf_int):
             Q_terms += 1
 
     # Ploting the ACF function
-    sm.graphics.tsa.plot_acf(timeseries.dropna(), lags = seasonality * 2, ax=ax1, color='green')
+    plot_correlations(ax1, acf_values, acf_confint, 'Autocorrelation')
     
     # Ploting the PACF function
-    sm.graphics.tsa.plot_pacf(timeseries.dropna(), lags = seasonality * 2, ax=ax2, color='green')
+    plot_correlations(ax2, pacf_values, pacf_confint, 'Partial Autocorrelation')
     
     plt.subplots_adjust(hspace=.4)
     st.pyplot()
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+METRICS = ['RMSE', 'MAE', 'MAPE', 'sMAPE', 'MASE', 'Bias']
+
+def forecast_metrics(actual_values, forecast_values, insample_values=None, seasonality=1):
+    '''
+    Computes the error metrics of forecasts in a single vectorized pass. A 2-D input (series x horizon) is scored
+    row by row, so many models or series are scored in one call. The values are broadcast against each other,
+    e.g. one row of actual values can be compared with the forecasts of many models
+
+    Args:
+        actual_values (Numpy Array, Pandas Series, iterable): the true values
+        forecast_values (Numpy Array, Pandas Series, iterable): the values predicted by the model
+        insample_values (Numpy Array, Pandas Series, iterable, optional): the values used to fit the model. The MAE of
+            their seasonal naive forecast scales the MASE. If None, MASE is NaN
+        seasonality (int): the lag of the seasonal naive forecast used by MASE. Use 1 for the naive forecast
+    Return:
+        metrics (dict): RMSE, MAE, MAPE (%), sMAPE (%), MASE, and Bias (mean of forecast - actual). The values are floats
+            for 1-D inputs, or arrays with one value per row for 2-D inputs. Missing values are ignored. Zero actual values
+            are left out of MAPE, and pairs of zeros count as no error on sMAPE
+    '''
+    actual_values = np.asarray(actual_values, dtype=float)
+    forecast_values = np.asarray(forecast_values, dtype=float)
+    errors = forecast_values - actual_values
+    absolute_errors = np.abs(errors)
+    absolute_actual_values = np.broadcast_to(np.abs(actual_values), errors.shape)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage_errors = np.where(absolute_actual_values > 0, absolute_errors / absolute_actual_values, np.nan)
+        denominators = absolute_actual_values + np.abs(forecast_values)
+        symmetric_errors = np.where(denominators > 0, 2 * absolute_errors / denominators, 0.)
+        symmetric_errors[np.isnan(errors)] = np.nan
+
+        mae = nanmean(absolute_errors)
+        metrics = {'RMSE': np.sqrt(nanmean(errors ** 2)),
+                   'MAE': mae,
+                   'MAPE': 100 * nanmean(percentage_errors),
+                   'sMAPE': 100 * nanmean(symmetric_errors),
+                   'MASE': np.full(np.shape(mae), np.nan),
+                   'Bias': nanmean(errors)}
+
+        if insample_values is not None:
+            insample_values = np.asarray(insample_values, dtype=float)
+            if insample_values.shape[-1] > seasonality:
+                scale = nanmean(np.abs(insample_values[..., seasonality:] - insample_values[..., :-seasonality]))
+                metrics['MASE'] = np.where(scale > 0, mae / scale, np.nan)
+
+    if errors.ndim <= 1:
+        metrics = {name: float(value) for name, value in metrics.items()}
+    return metrics
+
+def nanmean(values):
+    '''
+    Mean over the last axis ignoring NaN values, without the warning of numpy nanmean for rows with only NaN values
+    '''
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=-1)
+    totals = np.where(valid, values, 0.).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+def metrics_table(actual_values, forecast_values, insample_values=None, seasonality=1, index=None):
+    '''
+    Scores many forecasts (one per row) and returns the metrics as a table
+
+    Args:
+        actual_values, forecast_values, insample_values, seasonality: see forecast_metrics
+        index (iterable, optional): a label for each row (e.g. the terms of each model)
+    Return:
+        metrics (Pandas DataFrame): one row per forecast, and one column per metric
+    '''
+    metrics = forecast_metrics(np.atleast_2d(actual_values), np.atleast_2d(forecast_values), insample_values, seasonality)
+    return pd.DataFrame(metrics, columns=METRICS, index=index)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+def fourier_terms(index, periods, harmonics, start=0):
+    '''
+    Generates Fourier terms (pairs of sine and cosine waves) for seasonal cycles. Used as exogenous variables of a SARIMAX
+    model, they represent long or multiple seasonal periods (e.g. daily and weekly cycles on hourly data) with a few
+    regression coefficients, instead of the huge state vector of a seasonal ARIMA with a long period
+
+    Args:
+        index (Pandas Index): the index of the time series
+        periods (iterable): the seasonal periods, in amount of observations (e.g. 168 for weekly cycles on hourly data)
+        harmonics (int): amount of sine and cosine pairs for each period. Periods shorter than 2 * harmonics use fewer pairs
+        start (int): position of the first observation, counted from the start of the time series. It's used to continue
+            the waves on the test set and on the forecasts
+    Return:
+        terms (Pandas DataFrame): the Fourier terms, with one column per wave
+    '''
+    time = np.arange(start, start + len(index))
+    columns = []
+    names = []
+    for period in periods:
+        k = np.arange(1, min(harmonics, int(period // 2)) + 1)
+        angles = 2 * np.pi * np.outer(time, k) / period
+        # The sine wave of the Nyquist harmonic (k = period / 2) is zero on every observation
+        sine_k = k[2 * k != period]
+        columns += [np.sin(angles[:, 2 * k != period]), np.cos(angles)]
+        names += ['sin_{}_{}'.format(period, i) for i in sine_k] + ['cos_{}_{}'.format(period, i) for i in k]
+    return pd.DataFrame(np.hstack(columns) if len(columns) > 0 else np.empty((len(index), 0)), index=index, columns=names)
+
+def add_fourier_terms(exog_variables, index, periods, harmonics, start=0):
+    '''
+    Appends the Fourier terms of the seasonal periods to the exogenous variables
+
+    Args:
+        exog_variables (Pandas DataFrame, optional): the exogenous variables, or None
+        index (Pandas Index): the index of the time series
+        periods (iterable): the seasonal periods. If empty, the exogenous variables are returned unchanged
+        harmonics (int): amount of sine and cosine pairs for each period
+        start (int): position of the first observation, counted from the start of the time series
+    Return:
+        exog_variables (Pandas DataFrame): the exogenous variables with the Fourier terms, or None
+    '''
+    if len(periods) == 0:
+        return exog_variables
+    terms = fourier_terms(index, periods, harmonics, start)
+    if exog_variables is None:
+        return terms
+    return pd.concat([exog_variables, terms], axis=1)
@@ -15,6 +15,7 @@ def generate_code(filename, ds_column, y, test_stationarity_code, test_set_size,
 
                 from math import sqrt
                 from plotly.offline import iplot, init_notebook_mode
+                from scipy.special import boxcox, inv_boxcox
                 from sklearn.metrics import mean_squared_error, mean_absolute_error
                 from statsmodels.tsa.seasonal import seasonal_decompose
                 from statsmodels.tsa.stattools import adfuller
@@ -31,7 +32,7 @@ def generate_code(filename, ds_column, y, test_stationarity_code, test_set_size,
                 # Defining some functions
                 def mean_abs_pct_error(actual_values, forecast_values):
                     \'\'\'
-                    MAPE function to understand the average error percentage of the model
+                    MAPE function to understand the average error percentage of the model. Zero actual values are left out
 
                     Args.:
                         actual_values (Numpy 1D Array, List or Iterable): True values of the set
@@ -39,10 +40,10 @@ def generate_code(filename, ds_column, y, test_stationarity_code, test_set_size,
                     Return:
                         MAPE value (float)
                     \'\'\'
-                    err=0
-                    for i in range(len(forecast_values)):
-                        err += np.abs(actual_values.values[i] - forecast_values.values[i]) / actual_values.values[i]
-                    return err * 100/len(forecast_values)
+                    actual_values = np.asarray(actual_values, dtype=float)
+                    forecast_values = np.asarray(forecast_values, dtype=float)
+                    nonzero = actual_values != 0
+                    return 100 * np.mean(np.abs(actual_values[nonzero] - forecast_values[nonzero]) / np.abs(actual_values[nonzero]))
 
                 def decompose_series(ts):
                     \'\'\'
@@ -302,7 +303,7 @@ def generate_code(filename, ds_column, y, test_stationarity_code, test_set_size,
                 train_transformation_func = {0}
                 train_set = train_transformation_func(df.iloc[:-{1}])
                 test_set = train_transformation_func(df.iloc[-{1}:])
-                         '''.format('np.log1p' if transformation_function == np.log1p else 'lambda x: x', test_set_size)
+                         '''.format(transformation_function.code, test_set_size)
 
     train_model = f'''
                 # Training model
@@ -330,17 +331,18 @@ def generate_code(filename, ds_column, y, test_stationarity_code, test_set_size,
     
     predict_set = '''
                 predict_set(df, '{}', {}, {}, mod)
-                  '''.format(y, seasonality, 'np.log1p' if transformation_function == np.log1p else 'lambda x: x')
+                  '''.format(y, seasonality, transformation_function.code)
 
     forecasting_code =  '''
                 # Forecasting out-of-sample periods
-                forecasts = np.expm1(mod.forecast({0}))
-                confidence_interval = np.expm1(mod.get_forecast({0}).conf_int())
+                inverse_transformation_func = {2}
+                forecasts = inverse_transformation_func(mod.forecast({0}))
+                confidence_interval = inverse_transformation_func(mod.get_forecast({0}).conf_int())
                 
                 # Generating confidence interval and plotting forecasting
                 confidence_interval.columns = ['ci_lower', 'ci_upper']
                 plot_forecasts(forecasts, confidence_interval, '{1}')
-                        '''.format(periods_to_forecast, data_frequency)
+                        '''.format(periods_to_forecast, data_frequency, transformation_function.inverse_code)
 
     final_code = code_base + transform_time_series + test_stationarity + rolling_statistics + dickey_fuller_test + preprocessing_code + train_model + predict_set + forecasting_code
     return final_code
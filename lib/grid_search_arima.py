@@ -1,12 +1,177 @@
+import hashlib
+import json
 import numpy as np
+import os
 import statsmodels.api as sm
 import streamlit as st
+import time
 
-def grid_search_arima(train_data, exog,  p_range, q_range, P_range, Q_range, d=1, D=1, s=12):
+from candidates_store import candidatesStore
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from forecast_metrics import forecast_metrics
+from itertools import product
+from model_cache import data_fingerprint
+
+# Data shared with the worker processes of the parallel Grid Search. It's set once per worker by
+# init_grid_search_worker, so the training data is not pickled again for every candidate
+worker_data = {}
+
+def fit_candidate(train_data, exog, order, seasonal_order, warm_start_cache=None, model_cache=None, warm_start=True, **fit_kwargs):
+    '''
+    Fits a single SARIMAX candidate of the Grid Search
+
+    Args:
+        train_data (Pandas Series, Numpy Array, iterable): the training data containing endog variables
+        exog (Pandas Series, Numpy Array, iterable): exogenous variables
+        order (tuple): the (p, d, q) terms of the candidate
+        seasonal_order (tuple): the (P, D, Q, s) terms of the candidate
+        warm_start_cache (warmStartCache, optional): if passed, the optimizer starts from the parameters of the
+            closest order already fitted, and the fitted parameters are stored on it
+        model_cache (modelCache, optional): if passed, a candidate that was already fitted with the same data is loaded
+            from the disk instead of being fitted again
+        warm_start (bool): if False, the optimizer starts from the default parameters, but the fitted parameters are
+            still stored on warm_start_cache
+        fit_kwargs: extra arguments for the fit method of the model (e.g. maxiter)
+    Return:
+        model (Statsmodels SARIMAX results): the fitted candidate, or None if the model could not be fitted
+    '''
+    try:
+        # Attention: the model is fitted with parameter enforce_invertibility set to False.
+        # The main reason is to avoid convergence problems. Your final model should be fitted with
+        # this parameter set to True
+        mod = sm.tsa.statespace.SARIMAX(endog = train_data,
+                                        order = order,
+                                        exog = exog,
+                                        seasonal_order = seasonal_order,
+                                        enforce_invertibility=False)
+        start_params = warm_start_cache.start_params(mod) if warm_start_cache is not None and warm_start else None
+        if model_cache is not None:
+            # The disp argument only changes the optimizer output, so it's not part of the key. The starting parameters
+            # can change the optimum, so a warm started fit is never loaded by a cold started one, and vice versa
+            fit_options = {key: value for key, value in fit_kwargs.items() if key != 'disp'}
+            fit_options['enforce_invertibility'] = False
+            fit_options['warm_started'] = start_params is not None
+            cache_key = model_cache.key(train_data, exog, order, seasonal_order, fit_options)
+            model = model_cache.load(mod, cache_key)
+            if model is not None:
+                if warm_start_cache is not None:
+                    warm_start_cache.add(mod, model)
+                return model
+
+        model = mod.fit(start_params=start_params, **fit_kwargs)
+        if model_cache is not None:
+            model_cache.save(mod, cache_key, model)
+        if warm_start_cache is not None:
+            warm_start_cache.add(mod, model, warm_started=start_params is not None)
+        return model
+    except:
+        return None
+
+def candidate_record(model, order, seasonal_order, fit_time, validation_data=None, validation_exog=None, score=None):
+    '''
+    Summarizes a fitted candidate of the Grid Search in a compact record, so the results object (which holds the
+    filtered states of all the observations) doesn't need to be kept
+
+    Args:
+        model (Statsmodels SARIMAX results): the fitted candidate
+        order (tuple): the (p, d, q) terms of the candidate
+        seasonal_order (tuple): the (P, D, Q, s) terms of the candidate
+        fit_time (float): the time to fit the candidate, in seconds
+        validation_data (Pandas Series, Numpy Array, optional): observations following the training data, forecasted
+            by the candidate to compute its validation error
+        validation_exog (Pandas DataFrame, Numpy Array, optional): exogenous variables of the validation observations
+        score (float, optional): the score of the candidate given by a scoring function
+    Return:
+        record (dict): the terms, the information criteria, the in-sample RMSE, the validation RMSE and MAE (NaN
+            without validation data), the score, and the fit time of the candidate
+    '''
+    # The predictions burned by the diffuse initialization are left out of the in-sample error
+    burn = model.loglikelihood_burn
+    in_sample = forecast_metrics(np.asarray(model.model.endog)[burn:, 0], np.asarray(model.fittedvalues)[burn:])
+    record = {'order': order + seasonal_order, 'AIC': model.aic, 'BIC': model.bic, 'HQIC': model.hqic,
+              'RMSE': in_sample['RMSE'], 'Validation RMSE': np.nan, 'Validation MAE': np.nan,
+              'Score': score if score is not None else np.nan, 'Fit time': fit_time}
+    if validation_data is not None:
+        validation = forecast_metrics(validation_data, model.forecast(len(validation_data), exog=validation_exog))
+        record['Validation RMSE'] = validation['RMSE']
+        record['Validation MAE'] = validation['MAE']
+    return record
+
+def init_grid_search_worker(train_data, exog, model_cache=None, scoring_function=None, validation_data=None, validation_exog=None):
+    '''
+    Stores the training data (and the model cache, the scoring function, and the validation data, if any) on a worker
+    process of the parallel Grid Search
+    '''
+    worker_data['train_data'] = train_data
+    worker_data['exog'] = exog
+    worker_data['model_cache'] = model_cache
+    worker_data['scoring_function'] = scoring_function
+    worker_data['validation_data'] = validation_data
+    worker_data['validation_exog'] = validation_exog
+
+def evaluate_candidate(orders):
+    '''
+    Fits a candidate on a worker process and returns only its record, since the fitted model
+    is expensive to send back to the main process
+
+    Args:
+        orders (tuple): a tuple containing the (p, d, q) and the (P, D, Q, s) terms of the candidate. A third item
+            can be passed with a dictionary of arguments for the fit method of the model
+    Return:
+        record (dict): the compact record of the candidate (see candidate_record), or None if the model could not be fitted
+    '''
+    fit_kwargs = orders[2] if len(orders) > 2 else {}
+    start_time = time.time()
+    model = fit_candidate(worker_data['train_data'], worker_data['exog'], orders[0], orders[1],
+                          model_cache=worker_data['model_cache'], **fit_kwargs)
+    fit_time = time.time() - start_time
+    if model is None:
+        return None
+    # An error raised here would stop the stream of records of the Grid Search, so the candidate is skipped instead
+    try:
+        scoring_function = worker_data.get('scoring_function')
+        score = scoring_function(worker_data['train_data'], worker_data['exog'], model) if scoring_function is not None else None
+        return candidate_record(model, orders[0], orders[1], fit_time, worker_data.get('validation_data'),
+                                worker_data.get('validation_exog'), score)
+    except Exception:
+        return None
+
+def grid_candidates(p_range, q_range, P_range, Q_range, d=1, D=1, s=12):
+    '''
+    Lists the candidates of the Grid Search, in the same order of the nested loops over p, q, P, and Q
+
+    Return:
+        candidates (list): tuples with the (p, d, q) and the (P, D, Q, s) terms of each candidate
+    '''
+    return [((p_, d, q_), (P_, D, Q_, s)) for p_, q_, P_, Q_ in product(p_range, q_range, P_range, Q_range)]
+
+def checkpoint_path(checkpoint_folder, train_data, exog, validation_size=None, scoring_function=None):
+    '''
+    Path of the checkpoint of a Grid Search, keyed by the data and the options that change the records of the candidates
+
+    Args:
+        checkpoint_folder (str): the folder where the checkpoints are stored
+        train_data, exog, validation_size, scoring_function: see grid_search_arima
+    Return:
+        path (str): the path of the CSV file with the records of the candidates already evaluated
+    '''
+    # The options of the scoring function (e.g. the horizon of backtestScorer) change the scores
+    scoring_options = None if scoring_function is None else [type(scoring_function).__name__,
+                                                              sorted(getattr(scoring_function, '__dict__', {}).items())]
+    specification = json.dumps([validation_size, scoring_options], default=str)
+    key = hashlib.sha256((data_fingerprint(train_data, exog) + specification).encode()).hexdigest()
+    return os.path.join(checkpoint_folder, key + '.csv')
+
+def grid_search_arima(train_data, exog,  p_range, q_range, P_range, Q_range, d=1, D=1, s=12, n_jobs=1, warm_start_cache=None, model_cache=None,
+                      scoring_function=None, validation_size=None, top_k=20, log_path=None, checkpoint_folder=None, quiet=False):
     '''
     Grid search for SARIMAX models. This is a time consuming function that will iterate
     over different terms for AR and MA.
 
+    Only the results object of the best model so far is kept, and the compact records of the best top_k candidates
+    (see candidate_record), hence, the memory doesn't grow with the size of the grid
+
     Args:
         train_data (Pandas Series, Numpy Array, iterable): the training data containing endog variables
         exog (Pandas Series, Numpy Array, iterable): exogenous variables
@@ -17,52 +182,126 @@ def grid_search_arima(train_data, exog,  p_range, q_range, P_range, Q_range, d=1
         D_range (int): seasonal differencing terms
         Q_range (iterable): range of terms for Q
         s (int): seasonal frequency
+        n_jobs (int): amount of worker processes used to fit the candidates. If 1, the candidates are fitted
+            sequentially on the current process. The candidates always start from the default parameters, so the best
+            model is the same for any amount of workers
+        warm_start_cache (warmStartCache, optional): a cache where the fitted parameters are stored (e.g. to reuse them
+            on the final model). The candidates are not warm started from it, since the starting parameters would depend
+            on the order of the fits. Only the best model is stored when the candidates are fitted on worker processes
+        model_cache (modelCache, optional): a disk cache of fitted models. Candidates already fitted with the same data
+            are loaded from it instead of being fitted again
+        scoring_function (func, optional): a function called with the training data, the exogenous variables, and a fitted
+            candidate, which returns its score (lower is better), e.g. backtestScorer. If passed, the candidates are ranked by
+            their scores instead of the AIC, BIC, and HQIC. It must be picklable to be used with worker processes
+        validation_size (int, optional): if passed, the candidates are fitted without the last validation_size observations,
+            and ranked by the RMSE of their forecasts of them, instead of the AIC, BIC, and HQIC. The best model is fitted
+            again with all the training data
+        top_k (int): amount of best candidates shown on the candidates table. They are ranked by the score, the validation
+            RMSE, or the AIC
+        log_path (str, optional): path of a CSV file where the records of all the candidates are appended
+        checkpoint_folder (str, optional): if passed, the records are appended to a checkpoint on this folder, keyed by the
+            data (see checkpoint_path), instead of log_path. A search that was stopped skips the candidates already on its
+            checkpoint and chooses the same best model as a search that was never stopped
+        quiet (bool), default False: if True, this function will not show the best model results. Use it to run the search
+            outside of the Streamlit script, e.g. on a background thread
     Return:
-        current_best_model (Statsmodels SARIMAX results): a model with the best parameters, 
-            based on AIC, BIC, and HQIC metrics
-        models (list): all past models metrics for each iteractions
         best_model_order (tuple): best model terms
     '''
-    best_model_aic = np.Inf 
-    best_model_bic = np.Inf 
+    best_model_aic = np.Inf
+    best_model_bic = np.Inf
     best_model_hqic = np.Inf
+    best_model_error = np.inf
     best_model_order = (0, 0, 0)
-    models = []
-    with st.spinner('Finding best parameters. Please wait...'):
-        for p_ in p_range:
-            for q_ in q_range:
-                for P_ in P_range:
-                    for Q_ in Q_range:
-                        try:
-                            no_of_lower_metrics = 0
-                            # Attention: the model is fitted with parameter enforce_invertibility set to False.
-                            # The main reason is to avoid convergence problems. Your final model should be fitted with
-                            # this parameter set to True
-                            model = sm.tsa.statespace.SARIMAX(endog = train_data,
-                                                                order = (p_, d, q_),
-                                                                exog = exog,
-                                                                seasonal_order = (P_, D, Q_, s),
-                                                                enforce_invertibility=False).fit()
-                            models.append(model)
-                            if model.aic <= best_model_aic: no_of_lower_metrics += 1
-                            if model.bic <= best_model_bic: no_of_lower_metrics += 1
-                            if model.hqic <= best_model_hqic:no_of_lower_metrics += 1
-                            if no_of_lower_metrics >= 2:
-                                best_model_aic = np.round(model.aic,0)
-                                best_model_bic = np.round(model.bic,0)
-                                best_model_hqic = np.round(model.hqic,0)
-                                best_model_order = (p_, d, q_, P_, D, Q_, s)
-                                current_best_model = model
-                                resid = np.round(np.expm1(current_best_model.resid).mean(), 3)
-                                models.append(model)
-                                #st.markdown("------------------")
-                                #st.markdown("**Best model so far**: SARIMA {}".format(best_model_order)) 
-                                #st.markdown("**AIC**: {} **BIC**: {} **HQIC**: {} **Resid**: {}".format(best_model_aic, best_model_bic, best_model_hqic, resid))
-                        except:
-                            pass
-    st.success('Grid Search done!')
-    st.markdown('')
-    st.markdown('### Best model results')
-    st.text(current_best_model.summary())                
-    #return current_best_model, models, best_model_order
-    return best_model_order
\ No newline at end of file
+    current_best_model = None
+    if checkpoint_folder is not None:
+        log_path = checkpoint_path(checkpoint_folder, train_data, exog, validation_size, scoring_function)
+    candidates_store = candidatesStore(top_k, log_path)
+    finished_records = candidates_store.load_log() if checkpoint_folder is not None else {}
+
+    # The validation observations are left out of the fits
+    fit_data, fit_exog, validation_data, validation_exog = train_data, exog, None, None
+    if validation_size:
+        fit_data, validation_data = train_data[:-validation_size], np.asarray(train_data[-validation_size:], dtype=float)
+        if exog is not None:
+            fit_exog, validation_exog = exog[:-validation_size], exog[-validation_size:]
+
+    candidates = grid_candidates(p_range, q_range, P_range, Q_range, d, D, s)
+    pending_candidates = [candidate for candidate in candidates if candidate[0] + candidate[1] not in finished_records]
+
+    with st.spinner('Finding best parameters. Please wait...') if not quiet else nullcontext():
+        executor = None
+        candidates_records = None
+        if n_jobs > 1 and len(pending_candidates) > 0:
+            # The candidates are fitted on worker processes and their records are streamed back in the candidates order,
+            # hence, the best model is chosen exactly like in the sequential search
+            executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=init_grid_search_worker,
+                                           initargs=(fit_data, fit_exog, model_cache, scoring_function, validation_data, validation_exog))
+            candidates_records = executor.map(evaluate_candidate, pending_candidates)
+
+        for order, seasonal_order in candidates:
+            try:
+                no_of_lower_metrics = 0
+                # The candidates on the checkpoint are ranked again in the grid order, without being fitted again
+                record = finished_records.get(order + seasonal_order)
+                if record is not None:
+                    model = None
+                elif candidates_records is None:
+                    start_time = time.time()
+                    model = fit_candidate(fit_data, fit_exog, order, seasonal_order, warm_start_cache=warm_start_cache, model_cache=model_cache,
+                                          warm_start=False)
+                    fit_time = time.time() - start_time
+                    if model is None:
+                        continue
+                    score = scoring_function(fit_data, fit_exog, model) if scoring_function is not None else None
+                    record = candidate_record(model, order, seasonal_order, fit_time, validation_data, validation_exog, score)
+                else:
+                    model = None
+                    record = next(candidates_records)
+                    if record is None:
+                        continue
+
+                if scoring_function is not None or validation_size:
+                    # The scores (or the validation errors) replace the vote of the information criteria
+                    error = record['Score'] if scoring_function is not None else record['Validation RMSE']
+                    candidates_store.add(record, error, log=order + seasonal_order not in finished_records)
+                    if error < best_model_error:
+                        best_model_error = error
+                        no_of_lower_metrics = 3
+                else:
+                    candidates_store.add(record, record['AIC'], log=order + seasonal_order not in finished_records)
+                    if record['AIC'] <= best_model_aic: no_of_lower_metrics += 1
+                    if record['BIC'] <= best_model_bic: no_of_lower_metrics += 1
+                    if record['HQIC'] <= best_model_hqic:no_of_lower_metrics += 1
+                if no_of_lower_metrics >= 2:
+                    best_model_aic = np.round(record['AIC'],0)
+                    best_model_bic = np.round(record['BIC'],0)
+                    best_model_hqic = np.round(record['HQIC'],0)
+                    best_model_order = order + seasonal_order
+                    # Only the results of the best model so far are kept
+                    current_best_model = model
+                    #st.markdown("------------------")
+                    #st.markdown("**Best model so far**: SARIMA {}".format(best_model_order))
+                    #st.markdown("**AIC**: {} **BIC**: {} **HQIC**: {}".format(best_model_aic, best_model_bic, best_model_hqic))
+            except:
+                pass
+        if executor is not None:
+            executor.shutdown()
+
+        # Only the records are returned by the worker processes (and read from the checkpoint), and the validation observations
+        # are left out of the fits, so the best model is fitted again to show its results
+        if (current_best_model is None or validation_size) and len(best_model_order) == 7 and not quiet:
+            current_best_model = fit_candidate(train_data, exog, best_model_order[:3], best_model_order[3:],
+                                               warm_start_cache=warm_start_cache, model_cache=model_cache, warm_start=False)
+
+    if not quiet:
+        st.success('Grid Search done!')
+        st.markdown('')
+        st.markdown('### Best model results')
+        st.text(current_best_model.summary())
+        if len(candidates_store) > 0:
+            st.markdown('### Best {} of {} candidates'.format(min(top_k, len(candidates_store)), len(candidates_store)))
+            st.dataframe(candidates_store.table().dropna(axis=1, how='all'))
+        if warm_start_cache is not None and n_jobs == 1:
+            st.markdown('### Optimizer iterations')
+            st.dataframe(warm_start_cache.iterations_summary())
+    return best_model_order
@@ -0,0 +1,84 @@
+import numpy as np
+import streamlit as st
+
+from concurrent.futures import ProcessPoolExecutor
+from grid_search_arima import evaluate_candidate, fit_candidate, init_grid_search_worker
+from itertools import product
+
+def halving_search_arima(train_data, exog, p_range, q_range, P_range, Q_range, d=1, D=1, s=12, criterion='aic',
+                         keep_fraction=1/3, initial_maxiter=5, max_rounds=2, n_jobs=1, warm_start_cache=None,
+                         model_cache=None, quiet=False):
+    '''
+    Successive halving search for SARIMAX models. All the candidates of the grid are fitted with a small
+    budget of optimizer iterations and only the best fraction of them, based on the information criterion,
+    survives to the next round, where the budget is increased. The remaining candidates are fitted to
+    convergence and the best one is returned.
+
+    Args:
+        train_data (Pandas Series, Numpy Array, iterable): the training data containing endog variables
+        exog (Pandas Series, Numpy Array, iterable): exogenous variables
+        p_range (iterable): range of terms for p
+        q_range (iterable): range of terms for q
+        P_range (iterable): range of terms for P
+        Q_range (iterable): range of terms for Q
+        d (int): differencing terms
+        D (int): seasonal differencing terms
+        s (int): seasonal frequency
+        criterion (str): information criterion used to rank the candidates. It can be aic, bic, or hqic
+        keep_fraction (float): fraction of the candidates that survives each round
+        initial_maxiter (int): amount of optimizer iterations in the first round. The budget is divided by
+            keep_fraction on each round
+        max_rounds (int): maximum amount of pruning rounds before the final fit
+        n_jobs (int): amount of worker processes used to fit the candidates
+        warm_start_cache (warmStartCache, optional): a cache of fitted parameters used to warm start the candidates.
+            Each round continues from the parameters of the previous round. It's only used when n_jobs = 1
+        model_cache (modelCache, optional): a disk cache of fitted models. Candidates already fitted with the same data
+            and budget are loaded from it instead of being fitted again
+        quiet (bool), default False: if True, this function will not show the best model results
+    Return:
+        best_model_order (tuple): best model terms
+    '''
+
+    def rank_candidates(candidates, fit_kwargs):
+        # Returns the candidates sorted by the criterion. Candidates that couldn't be fitted are placed at the end
+        if n_jobs > 1:
+            jobs = [candidate + (fit_kwargs,) for candidate in candidates]
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_grid_search_worker, initargs=(train_data, exog, model_cache)) as executor:
+                candidates_records = list(executor.map(evaluate_candidate, jobs))
+            scores = [np.inf if record is None else record[criterion.upper()] for record in candidates_records]
+        else:
+            scores = []
+            for order, seasonal_order in candidates:
+                model = fit_candidate(train_data, exog, order, seasonal_order, warm_start_cache=warm_start_cache,
+                                      model_cache=model_cache, **fit_kwargs)
+                scores.append(np.inf if model is None else getattr(model, criterion))
+
+        # A stable sort keeps the grid order between candidates with the same score
+        ranking = np.argsort(scores, kind='mergesort')
+        return [candidates[i] for i in ranking], [scores[i] for i in ranking]
+
+    survivors = [((p_, d, q_), (P_, D, Q_, s)) for p_, q_, P_, Q_ in product(p_range, q_range, P_range, Q_range)]
+    maxiter = initial_maxiter
+
+    with st.spinner('Finding best parameters. Please wait...'):
+        for _ in range(max_rounds):
+            if len(survivors) <= 1:
+                break
+            survivors, _ = rank_candidates(survivors, {'maxiter': maxiter, 'disp': False})
+            survivors = survivors[:int(np.ceil(len(survivors) * keep_fraction))]
+            maxiter = int(np.ceil(maxiter / keep_fraction))
+
+        # Fitting the survivors to convergence
+        survivors, scores = rank_candidates(survivors, {'disp': False})
+        best_model_order = survivors[0][0] + survivors[0][1]
+
+    if not quiet:
+        st.success('Grid Search done!')
+        st.markdown('')
+        st.markdown('### Best model results')
+        st.text(fit_candidate(train_data, exog, best_model_order[:3], best_model_order[3:], warm_start_cache=warm_start_cache,
+                              model_cache=model_cache).summary())
+        if warm_start_cache is not None and n_jobs == 1:
+            st.markdown('### Optimizer iterations')
+            st.dataframe(warm_start_cache.iterations_summary())
+    return best_model_order
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+from power_transformation import identity_transformation
+
+class incrementalModel:
+    '''
+    Keeps a fitted SARIMAX model up to date when new observations arrive, without running the whole pipeline again.
+    Only the Kalman filter state at the end of the time series is stored: each update filters the new observations
+    starting from it, with the fitted parameters, so its cost doesn't depend on the length of the history. The
+    parameters are fitted again, on a bounded window of the latest observations, only when the standardized
+    forecast errors drift away from the model.
+    '''
+    def __init__(self, results, transformation_function=identity_transformation, drift_threshold=2., drift_window=24,
+                 refit_window=None):
+        '''
+        Args:
+            results (Statsmodels SARIMAX results): a model fitted with train_ts_model (or refit_ts_model)
+            transformation_function (transformationPair): the transformation applied to the time series before the
+                model (e.g. log), applied to the new observations and inverted on the forecasts
+            drift_threshold (float): the parameters are fitted again when the mean of the squared standardized forecast
+                errors of the last drift_window observations is above this value. Its expected value is 1 while the
+                model is right
+            drift_window (int): amount of latest standardized forecast errors used to detect a drift
+            refit_window (int, optional): amount of latest observations used to fit the parameters again. By default,
+                10 seasonal cycles, with at least 500 observations
+        '''
+        model = results.model
+        self.order = model.order
+        self.seasonal_order = model.seasonal_order
+        self.exog_names = model.exog_names if model.k_exog > 0 else None
+        self.params = np.asarray(results.params)
+        self.transformation_function = transformation_function
+        self.drift_threshold = drift_threshold
+        self.drift_window = drift_window
+        self.refit_window = refit_window if refit_window is not None else max(500, 10 * self.seasonal_order[3])
+        self.results = results
+        self.refits = 0
+        self.freq = getattr(model.data.row_labels, 'freq', None)
+
+        # Latest observations (already transformed), used by the refits
+        self.endog = pd.Series(np.asarray(model.endog)[-self.refit_window:, 0], index=model.data.row_labels[-self.refit_window:]) \
+            if model.data.row_labels is not None else pd.Series(np.asarray(model.endog)[-self.refit_window:, 0])
+        self.exog = model.data.orig_exog.iloc[-self.refit_window:] if self.exog_names is not None else None
+        self.errors = np.asarray(results.filter_results.standardized_forecasts_error[0, -drift_window:])
+        self.store_state(results)
+
+    def store_state(self, results):
+        '''
+        Stores the predicted state (and its covariance) for the next observation
+
+        Args:
+            results (Statsmodels SARIMAX results): the last filtered model
+        '''
+        self.state = np.array(results.filter_results.predicted_state[:, -1])
+        self.state_cov = np.array(results.filter_results.predicted_state_cov[:, :, -1])
+
+    def with_frequency(self, data):
+        '''
+        Sets the frequency of the fitted time series on the index of new data, which is lost when the index is
+        concatenated (or can't be inferred from a single observation). Without it, the forecasts have no dates
+
+        Args:
+            data (Pandas Series or DataFrame): the data, or None
+        Return:
+            data (Pandas Series or DataFrame): the data with the frequency on its index
+        '''
+        if data is not None and self.freq is not None and isinstance(data.index, pd.DatetimeIndex):
+            data = data.copy()
+            data.index = pd.DatetimeIndex(data.index, freq=self.freq)
+        return data
+
+    def build_model(self, endog, exog=None):
+        return sm.tsa.statespace.SARIMAX(endog,
+                                         order=self.order,
+                                         exog=exog,
+                                         seasonal_order=self.seasonal_order,
+                                         enforce_invertibility=False
+                                         )
+
+    def drift(self):
+        '''
+        Return:
+            drift (float): the mean of the squared standardized forecast errors of the last drift_window observations
+        '''
+        errors = self.errors[np.isfinite(self.errors)]
+        return np.mean(errors ** 2) if len(errors) > 0 else 0.
+
+    def update(self, new_endog, new_exog=None):
+        '''
+        Filters the new observations from the stored state. If the forecast errors drifted, the parameters are fitted
+        again on the latest refit_window observations
+
+        Args:
+            new_endog (Pandas Series): the new observations, in the original scale, following the last observation
+            new_exog (Pandas DataFrame, optional): the exogenous variables of the new observations, with the same
+                columns used to fit the model
+        Return:
+            refitted (bool): whether or not the parameters were fitted again
+        '''
+        if (new_exog is None) != (self.exog_names is None):
+            raise ValueError('The exogenous variables must be informed if, and only if, the model was fitted with them')
+        new_endog = self.with_frequency(self.transformation_function(new_endog))
+        if new_exog is not None:
+            new_exog = self.with_frequency(new_exog[self.exog_names])
+
+        mod = self.build_model(new_endog, new_exog)
+        mod.ssm.initialize_known(self.state, self.state_cov)
+        results = mod.filter(self.params)
+
+        # Bounded history, for the refits and the drift detection
+        self.endog = self.with_frequency(pd.concat([self.endog, new_endog]).iloc[-self.refit_window:])
+        if new_exog is not None:
+            self.exog = self.with_frequency(pd.concat([self.exog, new_exog]).iloc[-self.refit_window:])
+        new_errors = np.asarray(results.filter_results.standardized_forecasts_error[0])
+        self.errors = np.concatenate((self.errors, new_errors))[-self.drift_window:]
+
+        refitted = False
+        if len(self.errors) >= self.drift_window and self.drift() > self.drift_threshold:
+            mod = self.build_model(self.endog, self.exog)
+            results = mod.fit(start_params=self.params, disp=False)
+            self.params = np.asarray(results.params)
+            self.errors = np.zeros(0)
+            self.refits += 1
+            refitted = True
+
+        self.results = results
+        self.store_state(results)
+        return refitted
+
+    def forecast(self, periods_to_forecast, exog=None, alpha=0.05):
+        '''
+        Forecasts the next periods from the last observation
+
+        Args:
+            periods_to_forecast (int): amount of periods to forecast
+            exog (Pandas DataFrame, optional): the exogenous variables of the forecasted periods
+            alpha (float): significance level of the confidence interval
+        Return:
+            forecasts (Pandas Series): the forecasts, in the original scale of the time series
+            confidence_interval (Pandas DataFrame): the lower (ci_lower) and upper (ci_upper) limits of the confidence
+                interval of the forecasts, in the original scale of the time series
+        '''
+        if exog is not None:
+            exog = exog[self.exog_names]
+        forecast = self.results.get_forecast(periods_to_forecast, exog=exog)
+        forecasts = self.transformation_function.inverse(forecast.predicted_mean)
+        confidence_interval = self.transformation_function.inverse(forecast.conf_int(alpha=alpha))
+        confidence_interval.columns = ['ci_lower', 'ci_upper']
+        return forecasts, confidence_interval
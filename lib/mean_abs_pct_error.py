@@ -1,8 +1,8 @@
-import numpy as np
+from forecast_metrics import forecast_metrics
 
 def mean_abs_pct_error(actual_values, forecast_values):
     '''
-    MAPE function to understand the average error percentage of the model
+    MAPE function to understand the average error percentage of the model. Zero actual values are left out
 
     Args.:
         actual_values (Numpy 1D Array, List or Iterable): True values of the set
@@ -10,7 +10,4 @@ def mean_abs_pct_error(actual_values, forecast_values):
     Return:
         MAPE value (float)
     '''
-    err=0
-    for i in range(len(forecast_values)):
-        err += np.abs(actual_values.values[i] - forecast_values.values[i]) / actual_values.values[i]
-    return err * 100/len(forecast_values)
\ No newline at end of file
+    return forecast_metrics(actual_values, forecast_values)['MAPE']
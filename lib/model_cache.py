@@ -0,0 +1,139 @@
+import hashlib
+import json
+import numpy as np
+import os
+import pandas as pd
+
+def data_fingerprint(endog, exog=None):
+    '''
+    Generates a hash for the content of a time series (values and index) and its exogenous variables
+
+    Args:
+        endog (Pandas Series, Numpy Array): the time series
+        exog (Pandas DataFrame, Numpy Array, optional): the exogenous variables
+    Return:
+        fingerprint (str): a hexadecimal hash that only changes when the data changes
+    '''
+    fingerprint = hashlib.sha256()
+    for data in (endog, exog):
+        if data is None:
+            fingerprint.update(b'None')
+        elif isinstance(data, (pd.Series, pd.DataFrame)):
+            fingerprint.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+            if isinstance(data, pd.DataFrame):
+                fingerprint.update(json.dumps([str(column) for column in data.columns]).encode())
+        else:
+            fingerprint.update(np.ascontiguousarray(data, dtype=float).tobytes())
+    return fingerprint.hexdigest()
+
+class modelCache:
+    '''
+    Stores the parameters of fitted SARIMAX models on the disk, keyed by the data and the model specification.
+    A cached model is rebuilt by running the Kalman filter with the stored parameters, which is much cheaper
+    than a maximum likelihood fit. The least recently used models are removed when the cache is bigger than max_size.
+    A cache that can't be written (e.g. a read-only folder) never makes a fit fail: the model is just not stored.
+
+    Args:
+        folder (str): the folder where the models are stored
+        max_size (int): maximum size of the cache, in bytes
+    '''
+    def __init__(self, folder='.arauto_cache/models', max_size=256 * 1024 ** 2):
+        self.folder = folder
+        self.max_size = max_size
+        # Running size of the folder, so it's only scanned on the first save and when models must be evicted
+        self.cache_size = None
+
+    def key(self, endog, exog, order, seasonal_order, fit_options=None):
+        '''
+        Generates the key of a model, based on the data, the terms of the model, and the options used to fit it
+        '''
+        specification = json.dumps([list(order), list(seasonal_order), sorted((fit_options or {}).items())], default=str)
+        return hashlib.sha256((data_fingerprint(endog, exog) + specification).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.folder, key + '.npz')
+
+    def load(self, mod, key):
+        '''
+        Rebuilds a fitted model from the cache
+
+        Args:
+            mod (Statsmodels SARIMAX): a model with the same data and specification used to generate the key
+            key (str): the key of the model
+        Return:
+            results (Statsmodels SARIMAX results): the model filtered with the cached parameters, or None if
+                the model is not cached
+        '''
+        try:
+            with np.load(self.path(key)) as cached:
+                params = cached['params']
+                param_names = list(cached['param_names'])
+            # Updating the modification time of the file, which is used for the LRU eviction
+            os.utime(self.path(key), None)
+        except (IOError, KeyError, ValueError):
+            return None
+
+        if param_names != list(mod.param_names):
+            return None
+        return mod.filter(params)
+
+    def save(self, mod, key, results):
+        '''
+        Stores the parameters of a fitted model and evicts the least recently used models, if needed
+        '''
+        temporary_path = self.path(key) + '.tmp'
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+
+            # Writing on a temporary file first, so a cached file is never read half written
+            with open(temporary_path, 'wb') as cache_file:
+                np.savez(cache_file, params=np.asarray(results.params), param_names=np.array(mod.param_names))
+            os.replace(temporary_path, self.path(key))
+
+            if self.cache_size is None:
+                self.cache_size = sum(size for _, _, size in self.cached_files())
+            else:
+                self.cache_size += os.path.getsize(self.path(key))
+            if self.cache_size > self.max_size:
+                self.evict()
+        except OSError:
+            # The model was fitted, so a cache failure only skips the caching
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+    def cached_files(self):
+        '''
+        Lists the models stored on the cache
+
+        Return:
+            cached_files (list): tuples with the path, the modification time, and the size of each file. Files removed by
+                another process while the folder is scanned are left out
+        '''
+        cached_files = []
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith('.npz'):
+                try:
+                    status = entry.stat()
+                except OSError:
+                    continue
+                cached_files.append((entry.path, status.st_mtime, status.st_size))
+        return cached_files
+
+    def evict(self):
+        '''
+        Removes the least recently used models until the cache is smaller than 90% of max_size. The margin avoids
+        scanning the folder again on the next saves
+        '''
+        cached_files = sorted(self.cached_files(), key=lambda cached_file: cached_file[1])
+        self.cache_size = sum(size for _, _, size in cached_files)
+        for cached_file, _, size in cached_files:
+            if self.cache_size <= 0.9 * self.max_size:
+                break
+            try:
+                os.remove(cached_file)
+            except OSError:
+                # The file was already removed by another process
+                pass
+            self.cache_size -= size
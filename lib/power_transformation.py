@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+from scipy.optimize import minimize_scalar
+
+class transformationPair:
+    '''
+    A transformation of the time series and its inverse, which is used to bring the predictions back to the original
+    scale. The transformation is called like a function
+
+    Args:
+        function (func): the transformation
+        inverse (func): the inverse of the transformation
+        code (str): the Python code of the transformation, used by generate_code
+        inverse_code (str): the Python code of the inverse, used by generate_code
+    '''
+    def __init__(self, function, inverse, code, inverse_code):
+        self.function = function
+        self.inverse = inverse
+        self.code = code
+        self.inverse_code = inverse_code
+
+    def __call__(self, x):
+        return self.function(x)
+
+identity_transformation = transformationPair(lambda x: x, lambda x: x, 'lambda x: x', 'lambda x: x')
+log_transformation = transformationPair(np.log1p, np.expm1, 'np.log1p', 'np.expm1')
+
+def same_type(x, values):
+    '''
+    Returns the values with the same type, index, and columns of x (Pandas Series, Pandas DataFrame, or Numpy Array)
+    '''
+    if isinstance(x, pd.Series):
+        return pd.Series(values, index=x.index, name=x.name)
+    if isinstance(x, pd.DataFrame):
+        return pd.DataFrame(values, index=x.index, columns=x.columns)
+    return values
+
+def box_cox(x, lmbda):
+    values = np.asarray(x, dtype=float)
+    if lmbda == 0:
+        return same_type(x, np.log(values))
+    return same_type(x, np.expm1(lmbda * np.log(values)) / lmbda)
+
+def inverse_box_cox(x, lmbda):
+    values = np.asarray(x, dtype=float)
+    if lmbda == 0:
+        return same_type(x, np.exp(values))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Values out of the domain of the transformation (lmbda * x <= -1) are returned as NaN
+        return same_type(x, np.exp(np.log1p(lmbda * values) / lmbda))
+
+def yeo_johnson(x, lmbda):
+    values = np.asarray(x, dtype=float)
+    transformed = np.empty_like(values)
+    positive = values >= 0
+    if lmbda == 0:
+        transformed[positive] = np.log1p(values[positive])
+    else:
+        transformed[positive] = np.expm1(lmbda * np.log1p(values[positive])) / lmbda
+    if lmbda == 2:
+        transformed[~positive] = -np.log1p(-values[~positive])
+    else:
+        transformed[~positive] = -np.expm1((2 - lmbda) * np.log1p(-values[~positive])) / (2 - lmbda)
+    return same_type(x, transformed)
+
+def inverse_yeo_johnson(x, lmbda):
+    values = np.asarray(x, dtype=float)
+    inverse = np.empty_like(values)
+    positive = values >= 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if lmbda == 0:
+            inverse[positive] = np.expm1(values[positive])
+        else:
+            inverse[positive] = np.expm1(np.log1p(lmbda * values[positive]) / lmbda)
+        if lmbda == 2:
+            inverse[~positive] = -np.expm1(-values[~positive])
+        else:
+            inverse[~positive] = -np.expm1(np.log1p(-(2 - lmbda) * values[~positive]) / (2 - lmbda))
+    return same_type(x, inverse)
+
+def power_lambda(x, method='box-cox', lambda_range=(-2, 2), grid_size=17, grid_sample_size=20000):
+    '''
+    Estimates the lambda of a Box-Cox or Yeo-Johnson transformation by maximizing the profile log-likelihood.
+    The logarithms of the data are computed once. The likelihood is evaluated on a coarse grid of lambdas using an
+    evenly spaced sample of the data, and the best grid point is refined with all the data by a bounded search
+    between its neighbours
+
+    Args:
+        x (Pandas Series, Numpy Array, iterable): the time series. For Box-Cox, all the values must be positive
+        method (str): box-cox or yeo-johnson
+        lambda_range (tuple): the minimum and the maximum lambda
+        grid_size (int): amount of lambdas in the coarse grid
+        grid_sample_size (int): maximum amount of observations used to evaluate the coarse grid
+    Return:
+        lmbda (float): the estimated lambda
+    '''
+    values = np.asarray(x, dtype=float)
+    if method == 'box-cox':
+        if values.min() <= 0:
+            raise ValueError('The Box-Cox transformation requires positive values. Use the Yeo-Johnson transformation')
+        positive_logs = np.log(values)
+        negative_logs = np.empty(0)
+    else:
+        positive_logs = np.log1p(values[values >= 0])
+        negative_logs = np.log1p(-values[values < 0])
+
+    def negative_log_likelihood(lmbda, positive_logs, negative_logs):
+        # The variance is computed from the sums of both parts, so they are never concatenated
+        nobs = len(positive_logs) + len(negative_logs)
+        positive = positive_logs if lmbda == 0 else np.expm1(lmbda * positive_logs) / lmbda
+        negative = -negative_logs if lmbda == 2 else -np.expm1((2 - lmbda) * negative_logs) / (2 - lmbda)
+        mean = (positive.sum() + negative.sum()) / nobs
+        variance = (np.dot(positive, positive) + np.dot(negative, negative)) / nobs - mean ** 2
+        if variance <= 0 or not np.isfinite(variance):
+            return np.inf
+        return nobs / 2. * np.log(variance) - (lmbda - 1) * (positive_logs.sum() - negative_logs.sum())
+
+    step = max(1, (len(positive_logs) + len(negative_logs)) // grid_sample_size)
+    grid = np.linspace(lambda_range[0], lambda_range[1], grid_size)
+    best = int(np.argmin([negative_log_likelihood(lmbda, positive_logs[::step], negative_logs[::step]) for lmbda in grid]))
+
+    bounds = (grid[max(best - 1, 0)], grid[min(best + 1, grid_size - 1)])
+    result = minimize_scalar(negative_log_likelihood, bounds=bounds, args=(positive_logs, negative_logs), method='bounded', options={'xatol': 1e-5})
+    if any(abs(result.x - bound) < 1e-4 for bound in bounds if bound not in lambda_range):
+        # The optimum with all the data is out of the interval found with the sample
+        result = minimize_scalar(negative_log_likelihood, bounds=lambda_range, args=(positive_logs, negative_logs), method='bounded', options={'xatol': 1e-5})
+    return result.x
+
+def power_transformation(x, method=None, train_size=None):
+    '''
+    Builds a Box-Cox or Yeo-Johnson transformation, with the lambda estimated from the time series
+
+    Args:
+        x (Pandas Series, Numpy Array, iterable): the time series
+        method (str, optional): box-cox or yeo-johnson. If None, Box-Cox is used for positive series, and Yeo-Johnson otherwise
+        train_size (int, optional): amount of first observations used to estimate the lambda, so the test set doesn't
+            leak into the transformation. If None, all the observations are used
+    Return:
+        transformation (transformationPair): the transformation and its inverse
+    '''
+    values = np.asarray(x, dtype=float)
+    # The method is chosen with all the values, so the transformation is defined on the test set too
+    if method is None:
+        method = 'box-cox' if np.min(values) > 0 else 'yeo-johnson'
+    lmbda = float(power_lambda(values[:train_size], method))
+
+    if method == 'box-cox':
+        return transformationPair(lambda x: box_cox(x, lmbda), lambda x: inverse_box_cox(x, lmbda),
+                                  'lambda x: boxcox(x, {})'.format(lmbda), 'lambda x: inv_boxcox(x, {})'.format(lmbda))
+
+    # The generated code uses Pandas operations, so the index of the time series is kept
+    positive_code = 'np.log1p(x.clip(lower=0))' if lmbda == 0 else '((x.clip(lower=0) + 1) ** {0} - 1) / {0}'.format(lmbda)
+    negative_code = '-np.log1p(-x.clip(upper=0))' if lmbda == 2 else '-((1 - x.clip(upper=0)) ** {0} - 1) / {0}'.format(2 - lmbda)
+    positive_inverse_code = 'np.expm1(x.clip(lower=0))' if lmbda == 0 else '(x.clip(lower=0) * {0} + 1) ** (1 / {0}) - 1'.format(lmbda)
+    negative_inverse_code = '-np.expm1(-x.clip(upper=0))' if lmbda == 2 else '1 - (1 - x.clip(upper=0) * {0}) ** (1 / {0})'.format(2 - lmbda)
+    return transformationPair(lambda x: yeo_johnson(x, lmbda), lambda x: inverse_yeo_johnson(x, lmbda),
+                              'lambda x: ({}).where(x >= 0, {})'.format(positive_code, negative_code),
+                              'lambda x: ({}).where(x >= 0, {})'.format(positive_inverse_code, negative_inverse_code))
@@ -3,11 +3,9 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import streamlit as st
 
-from math import sqrt
-from mean_abs_pct_error import mean_abs_pct_error
-from sklearn.metrics import mean_squared_error, mean_absolute_error
+from forecast_metrics import forecast_metrics
 
-def predict_set(timeseries, y, seasonality, transformation_function, model, exog_variables=None,forecast=False, show_train_prediction=None, show_test_prediction=None):
+def predict_set(timeseries, y, seasonality, transformation_function, model, exog_variables=None,forecast=False, show_train_prediction=None, show_test_prediction=None, insample_values=None):
     '''
     Predicts the in-sample train observations
 
@@ -15,12 +13,15 @@ def predict_set(timeseries, y, seasonality, transformation_function, model, exog
         timeseries (Pandas Series): a time series that was used to fit a model
         y (str): the target column
         seasonality (int): the seasonality frequency
-        transformation_function (func): a function used to transform the target values
+        transformation_function (func): a function used to transform the target values and the predictions, usually the inverse
+            of the transformation used to train the model (e.g. transformationPair.inverse)
         model (Statsmodel object): a fitted model
         exog_variables (Pandas DataFrame): exogenous (independent) variables of your model
         forecast (bool): wether or not forecast the test set
         show_train_prediction (bool): wether or not to plot the train set predictions
         show_test_prediction (bool): wether or not to plot the test set predictions
+        insample_values (Pandas Series, optional): the train set, in the same scale of the predictions, used to scale the MASE of
+            the test set. If None, the MASE of the train set predictions is scaled by the train set itself
     '''
     timeseries = timeseries.to_frame()
     timeseries[y] = transformation_function(timeseries[y])
@@ -46,12 +47,20 @@ def predict_set(timeseries, y, seasonality, transformation_function, model, exog
         st.pyplot()
 
     try:
-        rmse = sqrt(mean_squared_error(timeseries[y].iloc[-(seasonality*3):], timeseries['ŷ'].iloc[-(seasonality*3):]))
+        # The metrics are computed at once over the last 3 seasonal cycles
+        evaluated = timeseries.iloc[-(seasonality*3):]
+        if insample_values is None and forecast == False:
+            insample_values = evaluated[y]
+        metrics = forecast_metrics(evaluated[y], evaluated['ŷ'], insample_values, seasonality)
+        rmse = metrics['RMSE']
         aic = model.aic
         bic = model.bic
         hqic = model.hqic
-        mape = np.round(mean_abs_pct_error(timeseries[y].iloc[-(seasonality*3):], timeseries['ŷ'].iloc[-(seasonality*3):]), 2)
-        mae = np.round(mean_absolute_error(timeseries[y].iloc[-(seasonality*3):], timeseries['ŷ'].iloc[-(seasonality*3):]), 2)
+        mape = np.round(metrics['MAPE'], 2)
+        mae = np.round(metrics['MAE'], 2)
+        smape = np.round(metrics['sMAPE'], 2)
+        mase = np.round(metrics['MASE'], 2)
+        bias = np.round(metrics['Bias'], 2)
     except ValueError:
         error_message = '''
                         There was a problem while we calculated the model metrics. 
@@ -60,6 +69,7 @@ def predict_set(timeseries, y, seasonality, transformation_function, model, exog
                         '''
         raise ValueError(error_message)
     
-    metrics_df = pd.DataFrame(data=[rmse, aic, bic, hqic, mape, mae], columns = ['{} SET METRICS'.format('TEST' if forecast else 'TRAIN')], index = ['RMSE', 'AIC', 'BIC', 'HQIC', 'MAPE', 'MAE'])
+    metrics_df = pd.DataFrame(data=[rmse, aic, bic, hqic, mape, mae, smape, mase, bias], columns = ['{} SET METRICS'.format('TEST' if forecast else 'TRAIN')], 
+                              index = ['RMSE', 'AIC', 'BIC', 'HQIC', 'MAPE', 'MAE', 'sMAPE', 'MASE', 'Bias'])
     st.markdown('### **Metrics**')
     st.dataframe(metrics_df)
\ No newline at end of file
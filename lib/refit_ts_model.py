@@ -0,0 +1,54 @@
+import numpy as np
+import statsmodels.api as sm
+
+# Maximum amount of optimizer iterations of the short re-optimization
+SHORT_REFIT_MAXITER = 10
+
+REFIT_MODES = ['Filter with the train set parameters', 'Short re-optimization', 'Full re-optimization']
+
+def refit_ts_model(Y, p, d, q, P, D, Q, s, params, refit_mode='Filter with the train set parameters', exog_variables=None, maxiter=SHORT_REFIT_MAXITER):
+    '''
+    Fits a SARIMAX model on the entire dataset reusing the parameters already fitted on the train set, instead of
+    optimizing them from scratch. The Kalman filter runs forward over all the observations with the train set parameters,
+    which are either kept as they are, or used as the starting point of a short re-optimization
+
+    Args.
+        Y (Pandas Series): the entire time series
+        p, d, q, P, D, Q, s (int): the terms of the model
+        params (dict): the parameters fitted on the train set, keyed by their names (e.g. warmStartCache params)
+        refit_mode (str): 'Filter with the train set parameters' keeps the parameters, 'Short re-optimization' runs
+            at most maxiter iterations of the optimizer from them
+        exog_variables (Pandas DataFrame, optional): exogenous variables to be used on the model
+        maxiter (int): maximum amount of iterations of the short re-optimization
+    Return:
+        results (Statsmodel fitted model): the model with the entire dataset, or None if params don't have all the
+            parameters of the model
+    '''
+    if refit_mode not in REFIT_MODES[:2]:
+        raise ValueError('refit_mode must be one of: {}'.format(', '.join(REFIT_MODES[:2])))
+
+    def build_model(initialization=None):
+        model_options = {'initialization': initialization} if initialization is not None else {}
+        return sm.tsa.statespace.SARIMAX(Y,
+                                         order = (p, d, q),
+                                         exog=exog_variables,
+                                         seasonal_order = (P, D, Q, s),
+                                         enforce_invertibility=False,
+                                         **model_options
+                                         )
+
+    mod = build_model()
+    if any(name not in params for name in mod.param_names):
+        return None
+    train_params = np.array([params[name] for name in mod.param_names])
+
+    def fit(mod):
+        if refit_mode == 'Filter with the train set parameters':
+            return mod.filter(train_params)
+        return mod.fit(start_params=train_params, maxiter=maxiter, disp=False)
+
+    try:
+        results = fit(mod)
+    except np.linalg.LinAlgError:
+        results = fit(build_model('approximate_diffuse'))
+    return results
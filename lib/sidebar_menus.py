@@ -1,16 +1,23 @@
+import os
 import streamlit as st
 import sys
 
-def sidebar_menus(menu_name, test_set_size=None, seasonality=None, terms=(0, 0, 0, 0, 0, 0, 0), df=None):
+from refit_ts_model import REFIT_MODES
+
+def sidebar_menus(menu_name, test_set_size=None, seasonality=None, terms=(0, 0, 0, 0, 0, 0, 0), df=None, suggestions=None):
     '''
     Generates the sidebar menus for Streamlit. Based on menu_name parameter, it returns different menus for each situation.
 
     Args.
         menu_name (str): a menu name that will be shown on the sidebar. It can be: absolute, seasonal, adfuller, train_predictions,
-        test_predictions, feature_target, or terms
+        test_predictions, feature_target, seasonality, terms, fourier_terms, decomposition_robustness,
+        refit_mode, backtest, grid_search_strategy, grid_search_ranking, grid_search_background,
+        or grid_search_workers
         seasonality (str, optional): a value to be replaced by a number. e.g.: if Hourly, this function will consider 24 for seasonality
         terms (7-value tuple): tuple with 7 integer values for p, d, q, P, D, Q, and s
         df (Pandas DataFrame, optional): a Pandas DataFrame containing some time series data to extract the columns
+        suggestions (list, optional): seasonal periods detected on the time series, offered as options by the seasonality
+        and fourier_terms menus
     '''
     seasonality_dict = {'Hourly': 24, 
                         'Daily': 7, 
@@ -24,6 +31,10 @@ def sidebar_menus(menu_name, test_set_size=None, seasonality=None, terms=(0, 0,
     elif menu_name == 'seasonal':
         show_seasonal_decompose = st.sidebar.checkbox('Seasonal decompose', value=True)
         return show_seasonal_decompose
+    elif menu_name == 'decomposition_robustness':
+        # Each iteration down-weights the outliers of the previous decomposition
+        robust_iterations = st.sidebar.slider('Robust decomposition iterations (less sensitive to outliers)', 0, 5, 0)
+        return robust_iterations
     elif menu_name == 'adfuller':
         show_adfuller = st.sidebar.checkbox('Dickey-Fuller statistical test', value=True)
         return show_adfuller
@@ -33,6 +44,10 @@ def sidebar_menus(menu_name, test_set_size=None, seasonality=None, terms=(0, 0,
     elif menu_name == 'test_predictions':
         show_test_predict_plot = st.sidebar.checkbox('Test set forecast', value=True)
         return show_test_predict_plot
+    elif menu_name == 'backtest':
+        show_backtest = st.sidebar.checkbox('Rolling-origin backtest', value=False)
+        backtest_folds = st.sidebar.slider('Backtest folds', 2, 10, 5) if show_backtest else 0
+        return show_backtest, backtest_folds
     elif menu_name == 'feature_target':
         data_frequency = st.sidebar.selectbox('What is the FREQUENCY of your data? ', ['Select a frequency', 'Hourly', 'Daily', 'Monthly', 'Quarterly', 'Yearly'], 0)
         
@@ -55,9 +70,19 @@ def sidebar_menus(menu_name, test_set_size=None, seasonality=None, terms=(0, 0,
         st.sidebar.markdown('### Force data transformation (optional)')
         transformation_techniques_list = ['Choose the best one', 'No transformation', 'First Difference', 
                                           'Log transformation', 'Seasonal Difference', 'Log First Difference', 
-                                          'Log Difference + Seasonal Difference', 'Custom Difference']
+                                          'Log Difference + Seasonal Difference', 'Box-Cox transformation', 'Box-Cox First Difference',
+                                          'Automatic Difference', 'Custom Difference']
         transformation_techniques = st.sidebar.selectbox('Transformation technique', transformation_techniques_list, 0)
         return transformation_techniques
+    elif menu_name == 'seasonality':
+        # The detected periods come first, and the default period of the frequency is always an option
+        default_period = seasonality_dict[seasonality]
+        periods = list(suggestions or []) + [default_period]
+        periods = [period for i, period in enumerate(periods) if period not in periods[:i]]
+        labels = ['{} (detected)'.format(period) if period in (suggestions or []) else '{} ({} default)'.format(period, seasonality) 
+                  for period in periods]
+        label = st.sidebar.selectbox('Seasonal period', labels, 0)
+        return periods[labels.index(label)]
     elif menu_name == 'terms':
         st.sidebar.markdown('### Model parameters')
         st.sidebar.text('Terms for (p, d, q)x(P, D, Q)s')
@@ -67,12 +92,51 @@ def sidebar_menus(menu_name, test_set_size=None, seasonality=None, terms=(0, 0,
         P = st.sidebar.slider('P (Seasonal AR)', 0, 30, min([terms[3], 30]))
         D = st.sidebar.slider('D (Amount of seasonal difference)', 0, 3, min([terms[4], 3]))
         Q = st.sidebar.slider('Q (Seasonal MA)', 0, 30, min([terms[5], 30]))
-        s = st.sidebar.slider('s (Seasonal frequency)', 0, 30, min([terms[6], 30]))
+        # Detected seasonal periods might be longer than 30 observations
+        s = st.sidebar.slider('s (Seasonal frequency)', 0, max([terms[6], 30]), terms[6])
         
         st.sidebar.markdown('# Forecast periods')
-        periods_to_forecast = st.sidebar.slider('How many periods to forecast?', 1, int(len(df.iloc[:-test_set_size])/3), int(seasonality/2))
+        max_periods_to_forecast = int(len(df.iloc[:-test_set_size])/3)
+        periods_to_forecast = st.sidebar.slider('How many periods to forecast?', 1, max_periods_to_forecast, max([min([int(seasonality/2), max_periods_to_forecast]), 1]))
         
         grid_search = st.sidebar.checkbox('Find the best parameters for me')
         train_model = st.sidebar.button('Do your Magic!')
 
-        return p, d, q, P, D, Q, s, train_model, periods_to_forecast, grid_search
\ No newline at end of file
+        return p, d, q, P, D, Q, s, train_model, periods_to_forecast, grid_search
+    elif menu_name == 'fourier_terms':
+        st.sidebar.markdown('### Multiple seasonality (optional)')
+        periods_label = 'Extra seasonal periods, separated by commas (e.g. 168 for weekly cycles on hourly data)'
+        if suggestions:
+            periods_label += '. Detected periods: {}'.format(', '.join(str(period) for period in suggestions))
+        periods_text = st.sidebar.text_input(periods_label, '')
+        try:
+            fourier_periods = tuple(float(period) for period in periods_text.replace(' ', '').split(',') if period != '')
+        except ValueError:
+            raise ValueError('The extra seasonal periods must be numbers separated by commas (e.g. 168, 8766)')
+        if any(period < 2 for period in fourier_periods):
+            raise ValueError('The extra seasonal periods must be greater than or equal to 2')
+        # Integer periods are shown without decimals on the names of the Fourier terms
+        fourier_periods = tuple(int(period) if period.is_integer() else period for period in fourier_periods)
+        fourier_harmonics = st.sidebar.slider('Fourier terms for each period', 1, 10, 3)
+        return fourier_periods, fourier_harmonics
+    elif menu_name == 'refit_mode':
+        # The final model reuses the parameters fitted on the train set, unless a full re-optimization is selected
+        refit_mode = st.sidebar.selectbox('Final model fit', REFIT_MODES, 0)
+        return refit_mode
+    elif menu_name == 'grid_search_strategy':
+        search_strategies_list = ['Exhaustive', 'Successive halving', 'Stepwise']
+        search_strategy = st.sidebar.selectbox('Grid Search strategy', search_strategies_list, 0)
+        return search_strategy
+    elif menu_name == 'grid_search_ranking':
+        # The validation error and the backtest rank the candidates by their forecasts instead of their in-sample fit
+        ranking_list = ['Information criteria (AIC, BIC, HQIC)', 'Validation error', 'Rolling-origin backtest']
+        ranking = st.sidebar.selectbox('Grid Search ranking', ranking_list, 0)
+        return ranking
+    elif menu_name == 'grid_search_background':
+        # A background search keeps running when the page is used (each interaction runs the script again)
+        run_in_background = st.sidebar.checkbox('Run Grid Search in the background', value=False)
+        return run_in_background
+    elif menu_name == 'grid_search_workers':
+        cpu_count = os.cpu_count() or 1
+        n_jobs = st.sidebar.slider('Grid Search workers (CPU cores)', 1, cpu_count, 1)
+        return n_jobs
\ No newline at end of file
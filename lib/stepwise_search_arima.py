@@ -0,0 +1,76 @@
+import numpy as np
+import streamlit as st
+
+from grid_search_arima import fit_candidate
+
+def stepwise_search_arima(train_data, exog, start_terms, d=1, D=1, s=12, max_terms=(5, 5, 2, 2), criterion='aic',
+                          warm_start_cache=None, model_cache=None, quiet=False):
+    '''
+    Stepwise search for SARIMAX models (Hyndman and Khandakar, 2008). Starting from the suggested terms,
+    this function will try to add or remove one term of p, q, P, or Q at a time, moving to the best neighbour
+    while it improves the information criterion. It fits far fewer models than the Grid Search.
+
+    Args:
+        train_data (Pandas Series, Numpy Array, iterable): the training data containing endog variables
+        exog (Pandas Series, Numpy Array, iterable): exogenous variables
+        start_terms (tuple): a 4-sized tuple with the initial terms for p, q, P, and Q (e.g. the find_acf_pacf suggestion)
+        d (int): differencing terms
+        D (int): seasonal differencing terms
+        s (int): seasonal frequency
+        max_terms (tuple): a 4-sized tuple with the maximum terms for p, q, P, and Q. If a start term is greater
+            than its maximum, the start term is used as the maximum
+        criterion (str): information criterion to minimize. It can be aic, bic, or hqic
+        warm_start_cache (warmStartCache, optional): a cache of fitted parameters used to warm start the neighbours
+        model_cache (modelCache, optional): a disk cache of fitted models. Models already fitted with the same data
+            are loaded from it instead of being fitted again
+        quiet (bool), default False: if True, this function will not show the best model results
+    Return:
+        best_model_order (tuple): best model terms
+    '''
+    max_terms = tuple(max(start, maximum) for start, maximum in zip(start_terms, max_terms))
+    scores = {}
+
+    def score(terms):
+        # Each set of terms is fitted only once, even if it's a neighbour of many visited models
+        if terms not in scores:
+            p_, q_, P_, Q_ = terms
+            model = fit_candidate(train_data, exog, (p_, d, q_), (P_, D, Q_, s), warm_start_cache=warm_start_cache,
+                                  model_cache=model_cache, disp=False)
+            scores[terms] = np.inf if model is None else getattr(model, criterion)
+        return scores[terms]
+
+    current_terms = tuple(start_terms)
+    with st.spinner('Finding best parameters. Please wait...'):
+        current_score = score(current_terms)
+        while True:
+            # Neighbours are the models with one more or one less term of p, q, P, or Q
+            neighbours = []
+            for i in range(4):
+                for step in (-1, 1):
+                    terms = list(current_terms)
+                    terms[i] += step
+                    if 0 <= terms[i] <= max_terms[i]:
+                        neighbours.append(tuple(terms))
+
+            if len(neighbours) == 0:
+                break
+            neighbours_scores = [score(terms) for terms in neighbours]
+            best_neighbour = int(np.argmin(neighbours_scores))
+            if neighbours_scores[best_neighbour] >= current_score:
+                break
+            current_terms = neighbours[best_neighbour]
+            current_score = neighbours_scores[best_neighbour]
+
+    p_, q_, P_, Q_ = current_terms
+    best_model_order = (p_, d, q_, P_, D, Q_, s)
+
+    if not quiet:
+        st.success('Stepwise search done! {} models were fitted'.format(len(scores)))
+        st.markdown('')
+        st.markdown('### Best model results')
+        st.text(fit_candidate(train_data, exog, best_model_order[:3], best_model_order[3:], warm_start_cache=warm_start_cache,
+                              model_cache=model_cache).summary())
+        if warm_start_cache is not None:
+            st.markdown('### Optimizer iterations')
+            st.dataframe(warm_start_cache.iterations_summary())
+    return best_model_order
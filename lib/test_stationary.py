@@ -3,10 +3,11 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from statsmodels.tsa.stattools import adfuller
 from transformation_function import timeSeriesTransformer
 
-def test_stationary(timeseries, plot_results=False, data_frequency=None, force_transformation_technique=None, custom_transformation_size=None):
+def test_stationary(timeseries, plot_results=False, data_frequency=None, force_transformation_technique=None, custom_transformation_size=None, n_jobs=1, seasonality=None, test_set_size=None):
     '''
     Augmented Dickey-Fuller Test in order to check if we have a stationary series
 
@@ -25,18 +26,25 @@ def test_stationary(timeseries, plot_results=False, data_frequency=None, force_t
         force_transformation_technique (str): a transformation technique name to be forced on this function
         custom_transformation_size (tuple of integers): a 2-sized tuple containing a integer for the differencing terms, 
             and one for seasonal differencing terms
+        n_jobs (int): amount of threads used to run the tests of the transformations. If 1, the tests run sequentially.
+            The best transformation is the same for any amount of threads
+        seasonality (int, optional): the seasonal period used by the seasonal differences (e.g. detected on the time series).
+            If None, the default period of data_frequency is used
+        test_set_size (int, optional): amount of last observations held out to test the model. They are not used to
+            estimate the lambda of the Box-Cox transformation
     
     Return:
         original_timeseries (Pandas Series): the original time series passed to the function 
         d (int): suggested value to be used for d (i) terms 
         D (int): suggested value to be used for D (seasonal difference) terms 
-        seasonality (int): the seasonal frequency that occurs in the time series. It's based on the data_frequency parameter
+        seasonality (int): the seasonal frequency that occurs in the time series. It's the seasonality parameter, or it's based
+            on the data_frequency parameter
         timeseries (Pandas Series): a transformed time series based on the best stationarity transformation (differencing, log, etc.)
-        transformation_function (function): the function that was used to transform the time series to be stationary. 
-        It can be a lambda function or a Numpy Log function (np.log1p)
+        transformation_function (transformationPair): the function that was used to transform the time series to be stationary
+        (identity, log, or Box-Cox), with its inverse
     '''
     
-    transformer = timeSeriesTransformer(timeseries, data_frequency)
+    transformer = timeSeriesTransformer(timeseries, data_frequency, seasonality, test_set_size)
     progress_bar = st.progress(0)
 
     if force_transformation_technique != None and force_transformation_technique != 'Choose the best one':
@@ -52,6 +60,12 @@ def test_stationary(timeseries, plot_results=False, data_frequency=None, force_t
             best_transformation = transformer.test_seasonal_difference()
         if force_transformation_technique == 'Log Difference + Seasonal Difference':
             best_transformation = transformer.test_seasonal_log_difference()
+        if force_transformation_technique == 'Box-Cox transformation':
+            best_transformation = transformer.test_power_transformation()
+        if force_transformation_technique == 'Box-Cox First Difference':
+            best_transformation = transformer.test_power_difference()
+        if force_transformation_technique == 'Automatic Difference':
+            best_transformation = transformer.test_automatic_difference()
         if force_transformation_technique == 'Custom Difference':
             # If a null value is passed by custom_transformation_size argument, raise an error
             if custom_transformation_size == None:
@@ -70,22 +84,36 @@ def test_stationary(timeseries, plot_results=False, data_frequency=None, force_t
         progress_bar.progress(100)
     
     else:
-        # Iterating over different stationarity transformations
-        absolute_test = transformer.test_absolute_data()
-        progress_bar.progress(20)
-        first_difference_test = transformer.test_first_difference()
-        progress_bar.progress(40)
-        log_difference_test = transformer.test_log_difference()
-        progress_bar.progress(60)
-        log_transformation_test = transformer.test_log_transformation()
-        progress_bar.progress(80)
-        seasonal_difference_test = transformer.test_seasonal_difference()
-        progress_bar.progress(100)
-        seasonal_log_difference_test = transformer.test_seasonal_log_difference()
+        test_names = ['test_absolute_data', 'test_first_difference', 'test_log_difference',
+                      'test_log_transformation', 'test_seasonal_difference', 'test_seasonal_log_difference']
+
+        if n_jobs > 1:
+            # The shared intermediates are computed once, before the threads start
+            transformer.intermediate('diff')
+            transformer.intermediate('log_diff')
+
+            def run_test(test_name):
+                # Each thread uses its own transformer, since the tests store their results on it
+                test_transformer = timeSeriesTransformer(timeseries, data_frequency, seasonality, test_set_size)
+                test_transformer.intermediates = transformer.intermediates
+                return getattr(test_transformer, test_name)()
+
+            # The results are stored in the tests order, hence, the best transformation is chosen exactly like in the
+            # sequential tests
+            transformations = [None] * len(test_names)
+            with ThreadPoolExecutor(max_workers=min(n_jobs, len(test_names))) as executor:
+                futures = {executor.submit(run_test, test_name): i for i, test_name in enumerate(test_names)}
+                for completed, future in enumerate(as_completed(futures)):
+                    transformations[futures[future]] = future.result()
+                    progress_bar.progress(int(100 * (completed + 1) / len(test_names)))
+        else:
+            # Iterating over different stationarity transformations
+            transformations = []
+            for i, test_name in enumerate(test_names):
+                transformations.append(getattr(transformer, test_name)())
+                progress_bar.progress(int(100 * (i + 1) / len(test_names)))
 
-        # Generating a list with all transformations
-        transformations = [absolute_test, first_difference_test, log_difference_test, 
-                        log_transformation_test, seasonal_difference_test, seasonal_log_difference_test]
+        absolute_test = transformations[0]
 
         # Best transformation so far. We start with the absolute and non-transformed data
         best_transformation = absolute_test
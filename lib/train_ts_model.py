@@ -2,7 +2,7 @@ import numpy as np
 import statsmodels.api as sm
 import streamlit as st
 
-def train_ts_model(Y, p, d, q, P, D, Q, s, exog_variables=None, quiet=False):
+def train_ts_model(Y, p, d, q, P, D, Q, s, exog_variables=None, quiet=False, warm_start_cache=None, model_cache=None):
     '''
     A function to train a time series model using a SARIMAX estimator
 
@@ -18,6 +18,10 @@ def train_ts_model(Y, p, d, q, P, D, Q, s, exog_variables=None, quiet=False):
         s (int): seasonality frequency
         exog_variables (Pandas Series): exogenous variables to be used on the model
         quiet (bool), default False: if True, this function will just train the model, without showing the summary information
+        warm_start_cache (warmStartCache, optional): if passed, the optimizer starts from the parameters of the closest order
+            already fitted (e.g. the same order fitted on the train set), and the fitted parameters are stored on it
+        model_cache (modelCache, optional): if passed, a model already fitted with the same data and terms is loaded
+            from the disk instead of being fitted again
     Return:
         results (Statsmodel fitted model): a fitted model based on the parameters 
     '''
@@ -37,9 +41,28 @@ def train_ts_model(Y, p, d, q, P, D, Q, s, exog_variables=None, quiet=False):
                                     seasonal_order = (P, D, Q, s),
                                     enforce_invertibility=False
                                     )
+    start_params = warm_start_cache.start_params(mod) if warm_start_cache is not None else None
+
+    def fit(mod, initialization=None):
+        # Loading the model from the disk cache, if it was already fitted with the same data and terms
+        if model_cache is not None:
+            # A warm started fit can reach another optimum, so it's never loaded by a cold started one, and vice versa
+            fit_options = {'enforce_invertibility': False, 'warm_started': start_params is not None}
+            if initialization is not None:
+                fit_options['initialization'] = initialization
+            cache_key = model_cache.key(Y, exog_variables, (p, d, q), (P, D, Q, s), fit_options)
+            results = model_cache.load(mod, cache_key)
+            if results is not None:
+                return results
+
+        results = mod.fit(start_params=start_params)
+        if model_cache is not None:
+            model_cache.save(mod, cache_key, results)
+        return results
+
     if quiet:
         try:
-            results = mod.fit()
+            results = fit(mod)
         except np.linalg.LinAlgError:
             mod = sm.tsa.statespace.SARIMAX(Y,
                                     order = (p, d, q),
@@ -48,12 +71,12 @@ def train_ts_model(Y, p, d, q, P, D, Q, s, exog_variables=None, quiet=False):
                                     enforce_invertibility=False,
                                     initialization='approximate_diffuse'
                                     )
-            results = mod.fit()
+            results = fit(mod, 'approximate_diffuse')
 
     else:
         with st.spinner(np.random.choice(waiting_messages)):
             try:
-                results = mod.fit()
+                results = fit(mod)
             except np.linalg.LinAlgError:
                 mod = sm.tsa.statespace.SARIMAX(Y,
                                         order = (p, d, q),
@@ -62,11 +85,14 @@ def train_ts_model(Y, p, d, q, P, D, Q, s, exog_variables=None, quiet=False):
                                         enforce_invertibility=False,
                                         initialization='approximate_diffuse'
                                         )
-                results = mod.fit()
+                results = fit(mod, 'approximate_diffuse')
         st.success('Done!')
         
         try:
             st.text(results.summary())
         except:
             pass
+
+    if warm_start_cache is not None:
+        warm_start_cache.add(mod, results, warm_started=start_params is not None)
     return results
\ No newline at end of file
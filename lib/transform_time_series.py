@@ -1,27 +1,121 @@
-from numpy import isscalar
-from pandas import DatetimeIndex, date_range, merge
-from streamlit import warning
-from statsmodels.tsa.seasonal import seasonal_decompose
-
-import statsmodels.api as sm
+from file_selector import read_columns
+from numpy import argmax, diff, flatnonzero, isfinite, zeros
+from pandas import DatetimeIndex, Series, Timedelta, date_range, infer_freq
+from pandas.tseries.frequencies import to_offset
+from streamlit import cache
+from statsmodels.tsa.tsatools import freq_to_period
 
 def test_time_series(ts):
     '''
-    This function will test the transformed time series with a decomposition and a model training. 
-    This will ensure that the data a proper format to be used in the rest of the project. This is a crucial
-    step to understand if the time series has a valid datetime index (used by decomposition function and ARIMA)
+    This function will test the transformed time series to ensure that the data is in a proper format to be used in the rest
+    of the project. This is a crucial step to understand if the time series has a valid datetime index (used by decomposition
+    function and ARIMA). The index and the values are checked directly, in a single pass over the data, instead of decomposing
+    the series and training a model with it
     '''
-    
-    # Decomposing series. A datetime index is required for this function. 
-    # If it raise an error, the time series doesn't have a datetime index
-    seasonal_decompose(ts)
+    index = ts.index
+
+    # The decomposition and the forecasts require a datetime index
+    if not isinstance(index, DatetimeIndex):
+        raise TypeError('The time series index is not a datetime type')
+    if not index.is_monotonic_increasing or not index.is_unique:
+        raise ValueError('The time series index must be sorted and must not contain duplicated dates')
+
+    # Without a frequency, the forecasts index would not be a datetime type. The frequency can't be inferred
+    # when there are gaps between the dates
+    frequency = index.freq if index.freq is not None else index.inferred_freq
+    if frequency is None:
+        raise ValueError('The frequency of the time series could not be inferred. Check if there are missing dates')
+
+    # The decomposition doesn't handle missing values and requires two complete seasonal cycles
+    if not isfinite(ts.values.astype(float)).all():
+        raise ValueError('The time series contains missing values')
+    period = freq_to_period(frequency)
+    if len(ts) < 2 * period:
+        raise ValueError('The time series must have 2 complete cycles, which requires {} observations'.format(2 * period))
+
+def infer_frequency(index):
+    '''
+    Infers the frequency of a sorted datetime index using all the dates, in a single pass. If there are missing dates,
+    the most common interval between consecutive dates is used
+
+    Args:
+        index (Pandas DatetimeIndex): a sorted datetime index
+    Return:
+        frequency (str or Pandas DateOffset): the inferred frequency, or None if it could not be inferred
+    '''
+    if index.inferred_freq is not None:
+        return index.inferred_freq
+    if len(index) < 3:
+        return None
+
+    # Most common interval between consecutive dates
+    intervals = Series(index.asi8[1:] - index.asi8[:-1])
+    interval = Timedelta(int(intervals.value_counts().idxmax()))
+    days = interval / Timedelta(days=1)
+
+    # Months, quarters, and years don't have a fixed size, so they are identified by a range of days
+    for min_days, max_days, months in [(28, 31, 1), (89, 92, 3), (365, 366, 12)]:
+        if min_days <= days <= max_days:
+            return calendar_frequency(index, months)
+
+    if days == 7:
+        return 'W-' + index[0].strftime('%a').upper()
+    return to_offset(interval)
+
+def calendar_frequency(index, months):
+    '''
+    Infers a frequency of months, quarters, or years from the longest run of dates without gaps. Hence, the frequency
+    keeps the anchor of the dates (e.g. YS-JUL for fiscal years starting in July, or QS-FEB)
 
-    # Training a simple model
-    mod = sm.tsa.statespace.SARIMAX(ts, order = (0, 0, 1))
-    results = mod.fit()
+    Args:
+        index (Pandas DatetimeIndex): a sorted datetime index
+        months (int): the amount of months between consecutive dates
+    Return:
+        frequency (str): the inferred frequency, or None if it could not be inferred (e.g. monthly dates on the 15th day,
+            which have no frequency alias)
+    '''
+    # A run ends on each gap, i.e. where consecutive dates are not the given amount of months apart
+    month_numbers = index.year.values * 12 + index.month.values
+    run_ends = flatnonzero(diff(month_numbers) != months)
+    run_bounds = [-1] + list(run_ends) + [len(index) - 1]
+    longest_run = argmax(diff(run_bounds))
+    run = index[run_bounds[longest_run] + 1:run_bounds[longest_run + 1] + 1]
+    if len(run) < 3:
+        return None
+    return infer_freq(run)
 
-    # Returns an error if the forecasts index is a scalar
-    assert not isscalar(results.forecast(10).index[0]), 'The forecasts index is not a datetime type'
+def repair_time_index(df, frequency):
+    '''
+    Reindexes a DataFrame to a regular datetime index, adding the missing dates
+
+    Args:
+        df (Pandas DataFrame): a DataFrame with a sorted and unique datetime index
+        frequency (str or Pandas DateOffset): the frequency of the dates
+    Return:
+        df (Pandas DataFrame): the DataFrame with a regular index and the missing dates filled with zeros
+        missing_positions (Numpy Array): the positions of the missing dates in the new index
+    '''
+    # Without a frequency, date_range would create daily dates
+    if frequency is None:
+        raise ValueError('The frequency of the dates could not be inferred')
+    full_index = date_range(df.index[0], df.index[-1], freq=frequency)
+
+    # Positions of the original dates in the regular index. Dates that are not in the regular index mean that
+    # the frequency doesn't fit the data
+    positions = full_index.get_indexer(df.index)
+    if (positions == -1).any():
+        raise ValueError('The dates are not aligned with the frequency {}'.format(frequency))
+
+    observed = zeros(len(full_index), dtype=bool)
+    observed[positions] = True
+    missing_positions = flatnonzero(~observed)
+
+    if len(missing_positions) > 0:
+        # A single reindex, without intermediate copies of the DataFrame
+        df = df.reindex(full_index, fill_value=0)
+    else:
+        df.index = full_index
+    return df, missing_positions
 
 def transform_time_series(df, ds_column, date_frequency, y):
     '''
@@ -34,6 +128,9 @@ def transform_time_series(df, ds_column, date_frequency, y):
 
     Return:
         df (Pandas Series): transformed DataFrame
+        missing_positions (Numpy Array): the positions of the missing dates, which were filled with zeros
+        frequency_fallback (bool): whether or not the frequency was taken from the FREQUENCY field, because it could not
+            be inferred from the dates
     '''
 
     date_frequency_dict = {'Hourly': 'H', 
@@ -45,56 +142,50 @@ def transform_time_series(df, ds_column, date_frequency, y):
     df.set_index(ds_column, inplace = True)
     df = df.dropna()
     try:
-        # Try to make a simple convertion
         df.index = df.index.astype('datetime64[ns]')
-        test_time_series(df[y])
-    except:
-        # If not pass, get the index frequency
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        if not df.index.is_unique:
+            raise ValueError('The DATE column contains duplicated dates')
+
+        frequency = infer_frequency(df.index)
+        frequency_fallback = False
         try:
-            date_format = DatetimeIndex(df.index[-10:], freq='infer')
-
-            # Try to apply the date frequency to data
-            df.index = df.asfreq(date_format.freq, fill_value=0)
-            test_time_series(df[y])
-        # This errors occurs when it finds null values
-        except ValueError:
-            try:
-                # Creating dataframe to fill the missing dates
-                fill_date_range = date_range(df.index.min(), df.index.max(), freq=date_format.freq)
-                df = merge(fill_date_range.to_frame().drop(0, axis=1), 
-                           df, 
-                           how = 'left', 
-                           right_index = True, 
-                           left_index = True)
-                # Filling null values
-                null_values = df[df.loc[:, y].isnull()].index.values
-                if len(null_values) > 0:
-                    warning('We found null values at {}. Filling it with zeros.'.format(null_values))
-                    df = df.fillna(0)
-                test_time_series(df[y])
-            except:
-                # If it doesn't work, try to infer the frequency based on the FREQUENCY field
-                try:
-                    warning_message = '''
-                                We could not find the proper date frequency of this dataset. 
-                                We will try to infer it based on the FREQUENCY field on the sidebar, but be sure that
-                                this dataset is in one of the following formats (Hourly, Daily, Monthly, Quarterly, or Yearly)
-                                '''
-                    warning(warning_message)
-                    df = df.asfreq(date_frequency_dict[date_frequency])
-                    
-                    # Filling null values
-                    null_values = df[df.loc[:, y].isnull()].index.values
-                    if len(null_values) > 0:
-                        warning('We found null values at {}. Filling it with zeros.'.format(null_values))
-                        df = df.fillna(0)
-                    test_time_series(df[y])
-                except:
-                    error_message = '''
-                                    There was a problem while we tried to convert the DATE column for a valid format.
-                                    Be sure there is no null value in the DATE column and that it is in a valid format for Pandas to_datetime function. 
-                                    Please, refer to (https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#offset-aliases) to know more abbout the
-                                    date frequencies
-                                    '''
-                    raise TypeError(error_message)
-    return df
\ No newline at end of file
+            df, missing_positions = repair_time_index(df, frequency)
+        except (TypeError, ValueError):
+            # If it doesn't work, try to infer the frequency based on the FREQUENCY field
+            frequency_fallback = True
+            df, missing_positions = repair_time_index(df, date_frequency_dict[date_frequency])
+        test_time_series(df[y])
+    except (TypeError, ValueError):
+        error_message = '''
+                        There was a problem while we tried to convert the DATE column for a valid format.
+                        Be sure there is no null value in the DATE column and that it is in a valid format for Pandas to_datetime function. 
+                        Please, refer to (https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#offset-aliases) to know more abbout the
+                        date frequencies
+                        '''
+        raise TypeError(error_message)
+    return df, missing_positions, frequency_fallback
+
+@cache(allow_output_mutation=True, show_spinner=False)
+def cached_transform_time_series(file_path, modification_time, ds_column, date_frequency, y, exog_columns=()):
+    '''
+    Reads the selected columns of a dataset and transforms them into a time series. The result is cached by Streamlit,
+    keyed by the file path, its modification time, the selected columns, and the frequency. Hence, an unchanged dataset
+    skips the parsing, the index repair, and the validation of the time series on each rerun. The warnings are not
+    shown on the cached runs, so this function returns what the caller needs to show them
+
+    Args:
+        file_path (str): the path of the dataset
+        modification_time (float): the last modification time of the file. It's only used as part of the cache key
+        ds_column (str): column name that will be used as an index
+        date_frequency (str): the frequency of the dataset. It could be daily, monthly, etc.
+        y (str): the target column
+        exog_columns (tuple): the exogenous variables columns
+
+    Return:
+        df (Pandas DataFrame): transformed DataFrame. It's shared between the reruns, so it must not be modified
+        missing_positions, frequency_fallback: see transform_time_series
+    '''
+    columns = (y,) + tuple(exog_columns)
+    return transform_time_series(read_columns(file_path, modification_time, ds_column, columns).copy(), ds_column, date_frequency, y)
@@ -1,30 +1,65 @@
 import numpy as np
+import pandas as pd
 
-from statsmodels.tsa.stattools import adfuller
+from auto_difference import auto_difference
+from batch_adfuller import batch_adfuller
+from power_transformation import identity_transformation, log_transformation, power_transformation
 
 class timeSeriesTransformer:
-    def __init__(self, original_timeseries, data_frequency):
+    def __init__(self, original_timeseries, data_frequency, seasonality=None, test_set_size=None):
         self.seasonality_dict = {'Hourly': 24, 
                                  'Daily': 7, 
                                  'Monthly': 12, 
                                  'Quarterly': 4, 
                                  'Yearly': 5}
-        self.seasonality = self.seasonality_dict[data_frequency]
+        # A seasonal period detected on the time series replaces the default period of the frequency
+        self.seasonality = seasonality if seasonality is not None else self.seasonality_dict[data_frequency]
         self.original_timeseries = original_timeseries
+        # Observations held out to test the model, which are not used to estimate the power transformation
+        self.test_set_size = test_set_size
         self.transformed_time_series = original_timeseries
         self.test_stationarity_code = None
-        self.transformation_function = lambda x: x
+        self.transformation_function = identity_transformation
         self.label = None
         self.d = 0
         self.D = 0
+        self.intermediates = {}
+
+    def intermediate(self, name):
+        '''
+        Returns a transformation of the original time series that is shared by many tests (log, first difference,
+        and log first difference). Each one is computed only once per transformer
+
+        Args:
+            name (str): the name of the transformation. It can be log, diff, log_diff, or power (Box-Cox or Yeo-Johnson)
+        Return:
+            transformed_time_series (pandas Series): the transformed time series, without dropping null values
+        '''
+        if name not in self.intermediates:
+            if name == 'log':
+                self.intermediates[name] = np.log1p(self.original_timeseries)
+            elif name == 'diff':
+                self.intermediates[name] = self.original_timeseries.diff()
+            elif name == 'log_diff':
+                self.intermediates[name] = self.intermediate('log').diff()
+            elif name == 'power':
+                # The lambda of the transformation is estimated once, on the train set, and the transformation is
+                # stored with the series
+                train_size = None
+                if self.test_set_size and self.test_set_size < len(self.original_timeseries):
+                    train_size = len(self.original_timeseries) - self.test_set_size
+                self.intermediates['power_transformation'] = power_transformation(self.original_timeseries, train_size=train_size)
+                self.intermediates[name] = self.intermediates['power_transformation'](self.original_timeseries)
+        return self.intermediates[name]
 
     def test_custom_difference(self, custom_transformation_size):
         self.d = custom_transformation_size[0]
         self.D = custom_transformation_size[1]
 
-        self.transformed_time_series = self.original_timeseries.diff(self.d).diff(self.seasonality * self.D).dropna()
-        self.dftest = adfuller(self.transformed_time_series, autolag='AIC')
-        self.transformation_function = lambda x: x
+        first_difference = self.intermediate('diff') if self.d == 1 else self.original_timeseries.diff(self.d)
+        self.transformed_time_series = first_difference.diff(self.seasonality * self.D).dropna()
+        self.dftest = batch_adfuller(self.transformed_time_series, autolag='AIC')
+        self.transformation_function = identity_transformation
 
         self.test_stationarity_code = '''
                 # Applying Augmented Dickey-Fuller test
@@ -35,6 +70,25 @@ class timeSeriesTransformer:
 
         return self.dftest, self.transformed_time_series, self.label, self.d, self.D, self.transformation_function, self.test_stationarity_code, self.seasonality
     
+    def test_automatic_difference(self):
+        '''
+        Run the Adfuller test on the original data with the amount of differences and seasonal differences found by
+        auto_difference. The returned values are the same of the other tests
+        '''
+        differenced, self.d, self.D = auto_difference(self.original_timeseries, self.seasonality)
+        self.transformed_time_series = pd.Series(differenced, index=self.original_timeseries.index[len(self.original_timeseries) - len(differenced):])
+        self.dftest = batch_adfuller(self.transformed_time_series, autolag='AIC')
+        self.transformation_function = identity_transformation
+
+        self.test_stationarity_code = '''
+                # Applying Augmented Dickey-Fuller test
+                dftest = adfuller(df{}{}.dropna(), autolag='AIC')
+                '''.format('.diff({})'.format(self.seasonality) * self.D, '.diff()' * self.d)
+
+        self.label = 'Automatic Difference' if self.dftest[0] < self.dftest[4]['1%'] else None
+
+        return self.dftest, self.transformed_time_series, self.label, self.d, self.D, self.transformation_function, self.test_stationarity_code, self.seasonality
+
     def test_absolute_data(self):
         '''
         Run the Adfuller test on the original data, without transformation
@@ -53,15 +107,14 @@ class timeSeriesTransformer:
                 applied, since it returns the original time series 
             D (int): the amount of seasonal integrated terms used in this function/transformation. For this function, no differencing is
                 applied, since it returns the original time series
-            transformation_function (func): this module contains two distinct transformation functions: numpy.log and lambda x: x.
-                This value informs what transformation function was used on the time series. If Logarithm was used, returns numpy.log,
-                otherwise, returns a lambda function 
+            transformation_function (transformationPair): the transformation that was used on the time series (identity, log, or
+                Box-Cox) and its inverse 
             test_stationarity_code (str): the code that was used on this transformation. This is used in future to generate the code
                 for the user on Arauto .
             seasonality (int): the amount of seasonality terms
         '''
 
-        self.dftest = adfuller(self.original_timeseries, autolag='AIC')
+        self.dftest = batch_adfuller(self.original_timeseries, autolag='AIC')
         
         self.test_stationarity_code = '''
                 # Applying Augmented Dickey-Fuller test
@@ -86,16 +139,15 @@ class timeSeriesTransformer:
                 Matplotlib plots in test_stationarity function 
             d (int): the amount of integrated terms used in this function/transformation.
             D (int): the amount of seasonal integrated terms used in this function/transformation.
-            transformation_function (func): this module contains two distinct transformation functions: numpy.log and lambda x: x.
-                This value informs what transformation function was used on the time series. If Logarithm was used, returns numpy.log,
-                otherwise, returns a lambda function 
+            transformation_function (transformationPair): the transformation that was used on the time series (identity, log, or
+                Box-Cox) and its inverse 
             test_stationarity_code (str): the code that was used on this transformation. This is used in future to generate the code
                 for the user on Arauto .
             seasonality (int): the amount of seasonality terms
         '''
 
-        self.transformed_time_series = self.original_timeseries.diff().dropna()
-        self.dftest = adfuller(self.transformed_time_series, autolag='AIC')
+        self.transformed_time_series = self.intermediate('diff').dropna()
+        self.dftest = batch_adfuller(self.transformed_time_series, autolag='AIC')
 
         self.test_stationarity_code = '''
                 # Applying Augmented Dickey-Fuller test
@@ -122,17 +174,16 @@ class timeSeriesTransformer:
                 Matplotlib plots in test_stationarity function 
             d (int): the amount of integrated terms used in this function/transformation.
             D (int): the amount of seasonal integrated terms used in this function/transformation.
-            transformation_function (func): this module contains two distinct transformation functions: numpy.log and lambda x: x.
-                This value informs what transformation function was used on the time series. If Logarithm was used, returns numpy.log,
-                otherwise, returns a lambda function 
+            transformation_function (transformationPair): the transformation that was used on the time series (identity, log, or
+                Box-Cox) and its inverse 
             test_stationarity_code (str): the code that was used on this transformation. This is used in future to generate the code
                 for the user on Arauto .
             seasonality (int): the amount of seasonality terms
         '''
 
-        self.transformed_time_series = np.log1p(self.original_timeseries)
-        self.dftest = adfuller(self.transformed_time_series, autolag='AIC')
-        self.transformation_function = np.log1p
+        self.transformed_time_series = self.intermediate('log')
+        self.dftest = batch_adfuller(self.transformed_time_series, autolag='AIC')
+        self.transformation_function = log_transformation
 
         self.test_stationarity_code = '''
                 # Applying Augmented Dickey-Fuller test
@@ -145,6 +196,46 @@ class timeSeriesTransformer:
 
         return self.dftest, self.transformed_time_series, self.label, self.d, self.D, self.transformation_function, self.test_stationarity_code, self.seasonality
 
+    def test_power_transformation(self):
+        '''
+        Run the Adfuller test on the original data with a Box-Cox transformation (or Yeo-Johnson, if the time series
+        has values that are not positive), with the lambda estimated from the time series. The returned values are the
+        same of the other tests
+        '''
+        self.transformed_time_series = self.intermediate('power')
+        self.dftest = batch_adfuller(self.transformed_time_series, autolag='AIC')
+        self.transformation_function = self.intermediates['power_transformation']
+
+        self.test_stationarity_code = '''
+                # Applying Augmented Dickey-Fuller test
+                df = ({})(df)
+                dftest = adfuller(df, autolag='AIC')
+                    '''.format(self.transformation_function.code)
+        self.label = 'Box-Cox transformation' if self.dftest[0] < self.dftest[4]['1%'] else None
+        self.d = 0
+        self.D = 0
+
+        return self.dftest, self.transformed_time_series, self.label, self.d, self.D, self.transformation_function, self.test_stationarity_code, self.seasonality
+
+    def test_power_difference(self):
+        '''
+        Run the Adfuller test on the original data with a Box-Cox transformation and first difference
+        '''
+        self.transformed_time_series = self.intermediate('power').diff().dropna()
+        self.dftest = batch_adfuller(self.transformed_time_series, autolag='AIC')
+        self.transformation_function = self.intermediates['power_transformation']
+
+        self.test_stationarity_code = '''
+                # Applying Augmented Dickey-Fuller test
+                df = ({})(df)
+                dftest = adfuller(df.diff().dropna(), autolag='AIC')
+                    '''.format(self.transformation_function.code)
+        self.label = 'Box-Cox First Difference' if self.dftest[0] < self.dftest[4]['1%'] else None
+        self.d = 1
+        self.D = 0
+
+        return self.dftest, self.transformed_time_series, self.label, self.d, self.D, self.transformation_function, self.test_stationarity_code, self.seasonality
+
     def test_seasonal_difference(self):
         '''
         Run the Adfuller test on the original data with seasonal difference
@@ -160,17 +251,16 @@ class timeSeriesTransformer:
                 Matplotlib plots in test_stationarity function 
             d (int): the amount of integrated terms used in this function/transformation.
             D (int): the amount of seasonal integrated terms used in this function/transformation.
-            transformation_function (func): this module contains two distinct transformation functions: numpy.log and lambda x: x.
-                This value informs what transformation function was used on the time series. If Logarithm was used, returns numpy.log,
-                otherwise, returns a lambda function 
+            transformation_function (transformationPair): the transformation that was used on the time series (identity, log, or
+                Box-Cox) and its inverse 
             test_stationarity_code (str): the code that was used on this transformation. This is used in future to generate the code
                 for the user on Arauto .
             seasonality (int): the amount of seasonality terms
         '''
 
         self.transformed_time_series = self.original_timeseries.diff(self.seasonality).dropna()
-        self.dftest = adfuller(self.transformed_time_series, autolag='AIC')
-        self.transformation_function = lambda x: x
+        self.dftest = batch_adfuller(self.transformed_time_series, autolag='AIC')
+        self.transformation_function = identity_transformation
 
         self.test_stationarity_code = '''
                 # Applying Augmented Dickey-Fuller test
@@ -197,17 +287,16 @@ class timeSeriesTransformer:
                 Matplotlib plots in test_stationarity function 
             d (int): the amount of integrated terms used in this function/transformation.
             D (int): the amount of seasonal integrated terms used in this function/transformation.
-            transformation_function (func): this module contains two distinct transformation functions: numpy.log and lambda x: x.
-                This value informs what transformation function was used on the time series. If Logarithm was used, returns numpy.log,
-                otherwise, returns a lambda function 
+            transformation_function (transformationPair): the transformation that was used on the time series (identity, log, or
+                Box-Cox) and its inverse 
             test_stationarity_code (str): the code that was used on this transformation. This is used in future to generate the code
                 for the user on Arauto .
             seasonality (int): the amount of seasonality terms
         '''
 
-        self.transformed_time_series = np.log1p(self.original_timeseries).diff().dropna()
-        self.dftest = adfuller(self.transformed_time_series, autolag='AIC')
-        self.transformation_function = np.log1p
+        self.transformed_time_series = self.intermediate('log_diff').dropna()
+        self.dftest = batch_adfuller(self.transformed_time_series, autolag='AIC')
+        self.transformation_function = log_transformation
 
         self.test_stationarity_code = '''
                 # Applying Augmented Dickey-Fuller test
@@ -235,17 +324,16 @@ class timeSeriesTransformer:
                 Matplotlib plots in test_stationarity function 
             d (int): the amount of integrated terms used in this function/transformation.
             D (int): the amount of seasonal integrated terms used in this function/transformation.
-            transformation_function (func): this module contains two distinct transformation functions: numpy.log and lambda x: x.
-                This value informs what transformation function was used on the time series. If Logarithm was used, returns numpy.log,
-                otherwise, returns a lambda function 
+            transformation_function (transformationPair): the transformation that was used on the time series (identity, log, or
+                Box-Cox) and its inverse 
             test_stationarity_code (str): the code that was used on this transformation. This is used in future to generate the code
                 for the user on Arauto .
             seasonality (int): the amount of seasonality terms
         '''
 
-        self.transformed_time_series = np.log1p(self.original_timeseries).diff().diff(self.seasonality).dropna()
-        self.dftest = adfuller(self.transformed_time_series, autolag='AIC')
-        self.transformation_function = np.log1p
+        self.transformed_time_series = self.intermediate('log_diff').diff(self.seasonality).dropna()
+        self.dftest = batch_adfuller(self.transformed_time_series, autolag='AIC')
+        self.transformation_function = log_transformation
 
         self.test_stationarity_code = '''
                 # Applying Augmented Dickey-Fuller test
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+class warmStartCache:
+    '''
+    Stores the parameters of fitted SARIMAX models, keyed by their order, to be used as starting parameters
+    of new fits. Neighbouring orders have similar solutions, so starting the optimizer from them takes fewer
+    iterations than starting from the default parameters.
+    '''
+    def __init__(self):
+        self.params = {}
+        self.fits = []
+
+    def key(self, model):
+        return tuple(model.order), tuple(model.seasonal_order)
+
+    def start_params(self, model):
+        '''
+        Builds the starting parameters of a model from the closest order already fitted. The parameters that
+        don't exist on the closest order (e.g. new lags) are filled with zeros
+
+        Args:
+            model (Statsmodels SARIMAX): a model that was not fitted yet
+        Return:
+            start_params (Numpy Array): the starting parameters, or None if there is no fitted model with the same
+                differencing and seasonal frequency, or if the starting parameters are not valid for the model
+        '''
+        (p, d, q), (P, D, Q, s) = self.key(model)
+        candidates = [key for key in self.params if key[0][1] == d and key[1][1] == D and key[1][3] == s]
+        if len(candidates) == 0:
+            return None
+
+        # Distance between the orders is the amount of terms to add or remove
+        distances = [abs(key[0][0] - p) + abs(key[0][2] - q) + abs(key[1][0] - P) + abs(key[1][2] - Q) for key in candidates]
+        closest_params = self.params[candidates[int(np.argmin(distances))]]
+
+        start_params = np.array([closest_params.get(name, 0.) for name in model.param_names])
+
+        # Removing lags from a stationary model might turn it into a non-stationary one
+        try:
+            if not np.all(np.isfinite(model.untransform_params(start_params))):
+                return None
+        except Exception:
+            return None
+        return start_params
+
+    def add(self, model, results, warm_started=False):
+        '''
+        Stores the parameters of a fitted model and the amount of iterations used by the optimizer
+
+        Args:
+            model (Statsmodels SARIMAX): the model that was fitted
+            results (Statsmodels SARIMAX results): the fitted model
+            warm_started (bool): whether or not the fit was started from the parameters of another order
+        '''
+        self.params[self.key(model)] = dict(zip(model.param_names, np.asarray(results.params)))
+
+        # Models that were not optimized (e.g. loaded from the model cache) don't have iterations to report
+        mle_retvals = getattr(results, 'mle_retvals', None)
+        if mle_retvals is not None:
+            self.fits.append({'order': self.key(model), 'warm_started': warm_started, 'iterations': mle_retvals.get('iterations', np.nan)})
+
+    def iterations_summary(self):
+        '''
+        Summarizes the amount of optimizer iterations of the cold and warm started fits
+
+        Return:
+            summary (Pandas DataFrame): the amount of fits, and the total and mean iterations for each kind of fit
+        '''
+        fits = pd.DataFrame(self.fits, columns=['order', 'warm_started', 'iterations'])
+        fits['warm_started'] = fits['warm_started'].map({True: 'Warm start', False: 'Cold start'})
+        summary = fits.groupby('warm_started')['iterations'].agg(['count', 'sum', 'mean'])
+        summary.columns = ['Fits', 'Total iterations', 'Mean iterations']
+        summary.index.name = ''
+        return summary
@@ -1,11 +1,26 @@
 import os
+import sys
 import urllib.request
 from app import app
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, redirect, jsonify
 from werkzeug.utils import secure_filename
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib'))
+from columnar_cache import convert_dataset
+
 ALLOWED_EXTENSIONS = set(['txt', 'csv', 'xlsx', 'xls'])
 
+# The uploaded datasets are converted on a background thread, one at a time, so the upload doesn't wait for the parsing
+conversion_executor = ThreadPoolExecutor(max_workers=1)
+
+def convert_uploaded_dataset(file_path):
+	# If the file can't be converted now, it's converted (or parsed) on its first read by the app
+	try:
+		convert_dataset(file_path)
+	except Exception:
+		app.logger.exception('Could not convert the dataset %s to the columnar format', file_path)
+
 def allowed_file(filename):
 	return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -23,7 +38,10 @@ def upload_file():
 		return resp
 	if file and allowed_file(file.filename):
 		filename = secure_filename(file.filename)
-		file.save(os.path.join(os.path.dirname(os.path.abspath(__file__)), app.config['UPLOAD_FOLDER'], filename))
+		file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), app.config['UPLOAD_FOLDER'], filename)
+		file.save(file_path)
+		# Storing a columnar copy of the dataset, so the app doesn't need to parse it
+		conversion_executor.submit(convert_uploaded_dataset, file_path)
 		resp = jsonify({'message' : 'File {} successfully uploaded to {}'.format(filename, os.path.dirname(os.path.abspath(__file__)))})
 		resp.status_code = 201
 		return resp
@@ -8,18 +8,28 @@ import sys
 sys.path.insert(0, 'lib/')
 #sys.tracebacklimit = 0 # Hide traceback on errors
 
+from backtest_arima import backtest_arima, backtestScorer
+from background_search import run_in_background, running_job
+from candidates_store import candidatesStore
 from decompose_series import decompose_series
-from file_selector import file_selector
+from detect_seasonality import detect_seasonality
+from file_selector import check_data_points, file_selector
 from find_acf_pacf import find_acf_pacf
+from fourier_terms import add_fourier_terms, fourier_terms
 from generate_code import generate_code
-from grid_search_arima import grid_search_arima
+from grid_search_arima import checkpoint_path, grid_candidates, grid_search_arima
+from halving_search_arima import halving_search_arima
 from mean_abs_pct_error import mean_abs_pct_error
+from model_cache import modelCache
 from plot_forecast import plot_forecasts
 from predict_set import predict_set
+from refit_ts_model import refit_ts_model
 from sidebar_menus import sidebar_menus
+from stepwise_search_arima import stepwise_search_arima
 from test_stationary import test_stationary
 from train_ts_model import train_ts_model
-from transform_time_series import transform_time_series
+from transform_time_series import cached_transform_time_series
+from warm_start_cache import warmStartCache
 
 pd.set_option('display.float_format', lambda x: '%.3f' % x) # Granting that pandas won't use scientific notation for floating fields
 
@@ -46,17 +56,16 @@ ds_column, y, data_frequency, test_set_size, exog_variables = sidebar_menus('fea
 # Name of the exogenous variables
 exog_variables_names = exog_variables
 
-# If there's not exogenous variables, it returns None
-exog_variables = df[exog_variables] if len(exog_variables) > 0 else None
-
 # Show plots
 plot_menu_title = st.sidebar.markdown('### Charts')
 plot_menu_text = st.sidebar.text('Select which charts you want to see')
 show_absolute_plot = sidebar_menus('absolute')
 show_seasonal_decompose = sidebar_menus('seasonal')
+decomposition_robust_iterations = sidebar_menus('decomposition_robustness') if show_seasonal_decompose else 0
 show_adfuller_test = sidebar_menus('adfuller')
 show_train_prediction = sidebar_menus('train_predictions')
 show_test_prediction = sidebar_menus('test_predictions')
+show_backtest, backtest_folds = sidebar_menus('backtest')
 force_transformation = sidebar_menus('force_transformations') # You can force a transformation technique
 
 difference_size = None
@@ -71,8 +80,32 @@ plot_adfuller_result = False
 if show_adfuller_test:
     plot_adfuller_result = True
 
-# Transform DataFrame to a Series
-df = transform_time_series(df, ds_column, data_frequency, y)
+# Transform DataFrame to a Series. Only the selected columns are read from the file, and the transformation
+# is cached while the file, columns and frequency don't change
+df, missing_positions, frequency_fallback = cached_transform_time_series(filename, os.path.getmtime(filename), ds_column, data_frequency, y, 
+                                                                        tuple(exog_variables_names))
+df = df.copy()
+
+# The warnings are shown here, since the cached transformation doesn't show them again on the reruns
+if frequency_fallback:
+    warning_message = '''
+                We could not find the proper date frequency of this dataset. 
+                We will try to infer it based on the FREQUENCY field on the sidebar, but be sure that
+                this dataset is in one of the following formats (Hourly, Daily, Monthly, Quarterly, or Yearly)
+                '''
+    st.warning(warning_message)
+if len(missing_positions) > 0:
+    st.warning('We found {} missing dates at positions {} ({}). Filling them with zeros.'.format(len(missing_positions), 
+                                                                                               missing_positions, 
+                                                                                               df.index[missing_positions].values))
+check_data_points(df)
+
+# If there's not exogenous variables, it returns None
+exog_variables = df[exog_variables_names] if len(exog_variables_names) > 0 else None
+
+# Seasonal periods detected on the time series, which replace the default period of the frequency
+detected_periods = detect_seasonality(df[y])
+seasonal_period = sidebar_menus('seasonality', seasonality=data_frequency, suggestions=detected_periods)
 
 # Show the historical plot?
 if show_absolute_plot:
@@ -84,18 +117,24 @@ if show_absolute_plot:
 # Show decomposition plot
 if show_seasonal_decompose:
     st.markdown('# Seasonal decomposition')
-    decompose_series(df)
+    decompose_series(df[y], seasonal_period, decomposition_robust_iterations)
 
 # Checking for stationarity in the series
 st.title('Checking stationarity')
 
+# The tests of the transformations run concurrently, one thread per CPU
+stationarity_workers = os.cpu_count() or 1
+
 # If a function is not forced by the user, use the default pipeline
 if force_transformation == None:
-    ts, d, D, seasonality, acf_pacf_data, transformation_function, test_stationarity_code = test_stationary(df[y], plot_adfuller_result, data_frequency)
+    ts, d, D, seasonality, acf_pacf_data, transformation_function, test_stationarity_code = test_stationary(df[y], plot_adfuller_result, data_frequency, n_jobs=stationarity_workers,
+                                                                                                            seasonality=seasonal_period, test_set_size=test_set_size)
 else:
     ts, d, D, seasonality, acf_pacf_data, transformation_function, test_stationarity_code = test_stationary(df[y], plot_adfuller_result, data_frequency, 
                                                                                                             force_transformation_technique = force_transformation, 
-                                                                                                            custom_transformation_size = (difference_size, seasonal_difference_size))
+                                                                                                            custom_transformation_size = (difference_size, seasonal_difference_size),
+                                                                                                            n_jobs=stationarity_workers,
+                                                                                                            seasonality=seasonal_period, test_set_size=test_set_size)
 
 st.title('ACF and PACF estimation')
 p, q, P, Q = find_acf_pacf(acf_pacf_data, seasonality)
@@ -114,8 +153,18 @@ except ValueError:
                     '''
     raise ValueError(error_message)
 
+# Extra seasonal periods, modeled as Fourier terms
+fourier_periods, fourier_harmonics = sidebar_menus('fourier_terms', suggestions=[period for period in detected_periods if period != seasonality])
+
+# How the final model is fitted on the entire dataset
+refit_mode = sidebar_menus('refit_mode')
+
 # Showing a warning when Grid Search operation is too expensive
 if execute_grid_search:
+    grid_search_strategy = sidebar_menus('grid_search_strategy')
+    grid_search_ranking = sidebar_menus('grid_search_ranking') if grid_search_strategy == 'Exhaustive' else None
+    grid_search_background = sidebar_menus('grid_search_background') if grid_search_strategy == 'Exhaustive' else False
+    grid_search_workers = sidebar_menus('grid_search_workers')
     if data_frequency in ['Hourly', 'Daily'] or p >= 5 or q >= 5:
         warning_grid_search = '''
                             Apply Grid Search on this dataset with these settings might be computationally expensive. 
@@ -137,9 +186,20 @@ if train_model:
     train_set = transformation_function(ts.iloc[:-test_set_size])
     
     test_set = transformation_function(ts.iloc[-test_set_size:])
+
+    # The extra seasonal periods are exogenous variables with the Fourier terms. The waves of the test set continue the train set
+    exog_train = add_fourier_terms(exog_train, train_set.index, fourier_periods, fourier_harmonics)
+    exog_test = add_fourier_terms(exog_test, test_set.index, fourier_periods, fourier_harmonics, start=len(train_set))
+    final_exog_variables = add_fourier_terms(exog_variables, ts.index, fourier_periods, fourier_harmonics)
     
+    # Fitted parameters are reused as starting parameters of the next fits (grid search and final model)
+    warm_start_cache = warmStartCache()
+
+    # Models already fitted with the same data and terms (e.g. on a previous run) are loaded from the disk
+    model_cache = modelCache()
+
     try:
-        model = train_ts_model(train_set, p, d, q, P, D, Q, s, exog_variables=exog_train, quiet=False)
+        model = train_ts_model(train_set, p, d, q, P, D, Q, s, exog_variables=exog_train, quiet=False, warm_start_cache=warm_start_cache, model_cache=model_cache)
     except ValueError as ve:
         if ve.args[0] == 'maxlag should be < nobs':
             raise ValueError('Seems that you don\'t have enough data. Try to use smaller terms for AR and MA (p, q, P, Q)')
@@ -148,17 +208,25 @@ if train_model:
 
     st.markdown('## **Train set prediction**')
     st.write('The model was trained with this data. It\'s trying to predict the same data')
-    if transformation_function == np.log1p:
-        predict_set(train_set.iloc[-24:], y, seasonality, np.expm1, model, show_train_prediction=show_train_prediction, show_test_prediction=show_test_prediction)
-    else:
-        predict_set(train_set.iloc[-24:], y, seasonality, transformation_function, model, show_train_prediction=show_train_prediction, show_test_prediction=show_test_prediction)
+    predict_set(train_set.iloc[-24:], y, seasonality, transformation_function.inverse, model, show_train_prediction=show_train_prediction, show_test_prediction=show_test_prediction)
     
     st.markdown('## **Test set forecast**')
     st.write('Unseen data. The model was not trained with this data and it\'s trying to forecast')
-    if transformation_function == np.log1p:
-        predict_set(test_set, y, seasonality, np.expm1, model, exog_variables=exog_test,forecast=True, show_train_prediction=show_train_prediction, show_test_prediction=show_test_prediction)
-    else:
-        predict_set(test_set, y, seasonality, transformation_function, model, exog_variables=exog_test, forecast=True, show_train_prediction=show_train_prediction, show_test_prediction=show_test_prediction)
+    predict_set(test_set, y, seasonality, transformation_function.inverse, model, exog_variables=exog_test, forecast=True, show_train_prediction=show_train_prediction, show_test_prediction=show_test_prediction,
+                insample_values=transformation_function.inverse(train_set))
+
+    # Forecasts from many origins at the end of the series, with the parameters fitted on the train set
+    if show_backtest:
+        st.markdown('## **Rolling-origin backtest**')
+        st.write('The model forecasts the next {} periods from {} different points of the time series'.format(test_set_size, backtest_folds))
+        backtest_errors = backtest_arima(transformation_function(ts), (p, d, q), (P, D, Q, s), test_set_size, backtest_folds, 
+                                         exog=final_exog_variables, params=np.asarray(model.params), n_jobs=os.cpu_count() or 1,
+                                         inverse_transformation=transformation_function.inverse)
+        st.markdown('### **Errors by forecasted period**')
+        st.dataframe(pd.DataFrame({'RMSE': np.sqrt((backtest_errors ** 2).mean()), 'MAE': backtest_errors.abs().mean(), 
+                                   'Bias': backtest_errors.mean()}))
+        st.markdown('### **Errors by origin**')
+        st.dataframe(backtest_errors)
 
     # Executing Grid Search
     if execute_grid_search:
@@ -167,26 +235,75 @@ if train_model:
                     We\'re going to find the best parameters for your model. This might take some minutes. 
                     Now it's a good time to grab some coffee.
                     ''')
-        p, d, q, P, D, Q, s = grid_search_arima(train_set, exog_train,  range(p+2), range(q+2), range(P+2), range(Q+2), d=d, D=D, s=s)
+        if grid_search_strategy == 'Stepwise':
+            p, d, q, P, D, Q, s = stepwise_search_arima(train_set, exog_train, (p, q, P, Q), d=d, D=D, s=s, warm_start_cache=warm_start_cache, model_cache=model_cache)
+        elif grid_search_strategy == 'Successive halving':
+            p, d, q, P, D, Q, s = halving_search_arima(train_set, exog_train,  range(p+2), range(q+2), range(P+2), range(Q+2), d=d, D=D, s=s, n_jobs=grid_search_workers, warm_start_cache=warm_start_cache, model_cache=model_cache)
+        else:
+            # The candidates forecast the last periods of the train set, as many as the validation set
+            validation_size = test_set_size if grid_search_ranking == 'Validation error' else None
+            scoring_function = backtestScorer(test_set_size) if grid_search_ranking == 'Rolling-origin backtest' else None
+            # The evaluated candidates are stored on a checkpoint, so a search that was stopped continues where it stopped
+            grid_search_checkpoints = '.arauto_cache/grid_search'
+            search_checkpoint = checkpoint_path(grid_search_checkpoints, train_set, exog_train, validation_size, scoring_function)
+            search_candidates = grid_candidates(range(p+2), range(q+2), range(P+2), range(Q+2), d, D, s)
+
+            # A search still running in the background is never run again at the same time, even without the background
+            # option, since both searches would write on the same checkpoint
+            search_job = running_job(search_checkpoint)
+            if search_job is None and grid_search_background:
+                finished_candidates = candidatesStore(log_path=search_checkpoint).load_log()
+                if any(order + seasonal_order not in finished_candidates for order, seasonal_order in search_candidates):
+                    search_job = run_in_background(search_checkpoint, grid_search_arima, train_set, exog_train,
+                                                   range(p+2), range(q+2), range(P+2), range(Q+2), d=d, D=D, s=s, n_jobs=grid_search_workers,
+                                                   model_cache=model_cache, scoring_function=scoring_function, validation_size=validation_size,
+                                                   checkpoint_folder=grid_search_checkpoints, quiet=True)
+            if search_job is not None:
+                finished_candidates = candidatesStore(log_path=search_checkpoint).load_log()
+                st.info('''
+                        The Grid Search is running in the background: {} of {} candidates were evaluated. Click "Do your Magic!" 
+                        again to check its progress. Meanwhile, the selected terms are used.
+                        '''.format(sum(order + seasonal_order in finished_candidates for order, seasonal_order in search_candidates),
+                                   len(search_candidates)))
+            else:
+                # After a background search, all the candidates are read from the checkpoint
+                p, d, q, P, D, Q, s = grid_search_arima(train_set, exog_train,  range(p+2), range(q+2), range(P+2), range(Q+2), d=d, D=D, s=s, n_jobs=grid_search_workers, warm_start_cache=warm_start_cache, model_cache=model_cache,
+                                                        scoring_function=scoring_function, validation_size=validation_size, checkpoint_folder=grid_search_checkpoints)
         
     # Forecasting data
     st.markdown('# Out-of-sample Forecast')
     
-    # Creating final model
+    # Creating final model. The parameters fitted on the train set (with the same terms) are reused, unless a
+    # full re-optimization is selected
+    fits_before_final_model = len(warm_start_cache.fits)
+    final_model = None
     with st.spinner('Training model with entire dataset. Please wait.'):
-        final_model = train_ts_model(transformation_function(ts), p, d, q, P, D, Q, s, exog_variables=exog_variables, quiet=True)
-    st.success('Done!')
+        train_params = warm_start_cache.params.get(((p, d, q), (P, D, Q, s)))
+        if refit_mode != 'Full re-optimization' and train_params is not None:
+            final_model = refit_ts_model(transformation_function(ts), p, d, q, P, D, Q, s, train_params, refit_mode, 
+                                         exog_variables=final_exog_variables)
+        if final_model is None:
+            final_model = train_ts_model(transformation_function(ts), p, d, q, P, D, Q, s, exog_variables=final_exog_variables, quiet=True, 
+                                         warm_start_cache=warm_start_cache, model_cache=model_cache)
+    if getattr(final_model, 'mle_retvals', None) is not None:
+        st.success('Done! The optimizer took {} iterations'.format(final_model.mle_retvals.get('iterations', np.nan)))
+    elif len(warm_start_cache.fits) == fits_before_final_model and refit_mode == 'Filter with the train set parameters':
+        st.success('Done! The parameters of the train set were used')
+    else:
+        st.success('Done! The model was loaded from the cache')
     
     if type(exog_variables) == type(pd.DataFrame()):
         st.write('You are using exogenous variables. We can\'t forecast the future since we don\'t have the exogenous variables for future periods. Adapt the code below to use them.' )
     else:
-        if transformation_function == np.log1p:
-            forecasts = np.expm1(final_model.forecast(periods_to_forecast))
-            confidence_interval = np.expm1(final_model.get_forecast(periods_to_forecast).conf_int())
+        # The Fourier terms are known for the future periods, so they are generated for the forecasts
+        future_exog_variables = None
+        if len(fourier_periods) > 0:
+            future_index = pd.date_range(ts.index[-1], periods=periods_to_forecast + 1, freq=ts.index.freq)[1:]
+            future_exog_variables = fourier_terms(future_index, fourier_periods, fourier_harmonics, start=len(ts))
 
-        else:
-            forecasts = final_model.forecast(periods_to_forecast)
-            confidence_interval = final_model.get_forecast(periods_to_forecast).conf_int()
+        # Bringing the forecasts back to the original scale of the time series
+        forecasts = transformation_function.inverse(final_model.forecast(periods_to_forecast, exog=future_exog_variables))
+        confidence_interval = transformation_function.inverse(final_model.get_forecast(periods_to_forecast, exog=future_exog_variables).conf_int())
 
         confidence_interval.columns = ['ci_lower', 'ci_upper']
         plot_forecasts(forecasts, confidence_interval, data_frequency)
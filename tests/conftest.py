@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules of Arauto are imported from the lib folder, like on run.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib'))
@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from detect_seasonality import detect_seasonality
+
+def hourly_series(nobs, seed):
+    # Daily and weekly cycles of hourly data, with noise
+    time = np.arange(nobs)
+    noise = np.random.RandomState(seed).randn(nobs)
+    return np.sin(2 * np.pi * time / 24) + np.sin(2 * np.pi * time / 168) + noise
+
+@pytest.mark.parametrize('nobs, seed', [(20000, 1), (20000, 2), (300000, 1), (1000000, 1)])
+def test_neighbour_lags_are_one_period(nobs, seed):
+    assert detect_seasonality(hourly_series(nobs, seed)) == [24, 168]
+
+def test_noise_has_no_seasonality():
+    assert detect_seasonality(np.random.RandomState(0).randn(5000)) == []
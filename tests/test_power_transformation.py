@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+from power_transformation import box_cox, power_lambda
+from transformation_function import timeSeriesTransformer
+
+def test_lambda_is_estimated_on_the_train_set():
+    train = np.exp(np.random.RandomState(0).randn(200) * .3 + 3)
+    # A test set with a very different scale would change the lambda if it leaked into the estimation
+    ts = pd.Series(np.append(train, train[-12:] * 50), index=pd.date_range('2000-01-01', periods=212, freq='D'))
+
+    transformer = timeSeriesTransformer(ts, 'Daily', test_set_size=12)
+    transformation = transformer.test_power_transformation()[5]
+    expected = box_cox(ts, power_lambda(train))
+    assert np.allclose(transformation(ts), expected)
+    assert not np.allclose(transformation(ts), box_cox(ts, power_lambda(ts)))
@@ -0,0 +1,107 @@
+import numpy as np
+import os
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+
+from statsmodels.tsa.seasonal import seasonal_decompose
+from transform_time_series import infer_frequency, repair_time_index, transform_time_series
+# Imported with another name, so pytest doesn't collect it as a test
+from transform_time_series import test_time_series as validate_time_series
+
+def gapped_frame(freq, start, periods=39, gap=10):
+    index = pd.date_range(start, periods=periods, freq=freq).delete(gap)
+    return pd.DataFrame({'ds': index, 'y': np.arange(1., periods)})
+
+@pytest.mark.parametrize('freq, start', [('YS-JUL', '1980-07-01'), ('QS-FEB', '2000-02-01')])
+def test_anchored_gap_keeps_the_anchor(freq, start):
+    df = gapped_frame(freq, start)
+    frequency = infer_frequency(pd.DatetimeIndex(df['ds']))
+    assert pd.date_range(start, periods=39, freq=frequency).equals(pd.date_range(start, periods=39, freq=freq))
+
+    ts, missing_positions, frequency_fallback = transform_time_series(df, 'ds', 'Yearly', 'y')
+    assert not frequency_fallback
+    assert list(missing_positions) == [10]
+    assert len(ts) == 39
+    assert ts['y'].iloc[10] == 0
+    assert (ts['y'].drop(ts.index[10]).values == np.arange(1., 39)).all()
+
+def test_gap_without_frequency_alias_is_not_filled_daily():
+    # Monthly dates on the 15th day have no frequency alias, so they must not be repaired with daily dates
+    df = gapped_frame('MS', '2000-01-01')
+    df['ds'] = df['ds'] + pd.Timedelta(days=14)
+    assert infer_frequency(pd.DatetimeIndex(df['ds'])) is None
+    with pytest.raises(ValueError):
+        repair_time_index(df.set_index('ds'), None)
+    with pytest.raises(TypeError):
+        transform_time_series(df, 'ds', 'Monthly', 'y')
+
+DATASETS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'datasets')
+
+def baseline_test_time_series(ts):
+    # The previous validation, which decomposed the series and trained a model with it
+    seasonal_decompose(ts)
+    results = sm.tsa.statespace.SARIMAX(ts, order=(0, 0, 1)).fit(disp=False)
+    assert not np.isscalar(results.forecast(10).index[0]), 'The forecasts index is not a datetime type'
+
+def bundled_dataset(file_name, parse_dates=True):
+    return pd.read_csv(os.path.join(DATASETS_FOLDER, file_name), index_col=0, parse_dates=parse_dates).iloc[:, 0].astype(float)
+
+def monthly_series(periods=48):
+    return pd.Series(np.sin(np.arange(periods)) + 10, index=pd.date_range('2000-01-01', periods=periods, freq='MS'))
+
+def with_nan():
+    ts = monthly_series()
+    ts.iloc[5] = np.nan
+    return ts
+
+def with_duplicated_date():
+    ts = monthly_series()
+    return ts.iloc[list(range(20)) + [19] + list(range(20, 48))]
+
+# Series and whether they are valid time series. The expected decisions are the decisions of the baseline validation
+VALIDATION_CASES = {
+    'daily_total_female_births': (lambda: bundled_dataset('daily_total_female_births.csv'), True),
+    'monthly_air_passengers': (lambda: bundled_dataset('monthly_air_passengers.csv'), True),
+    'monthly_wine_sales': (lambda: bundled_dataset('monthly_wine_sales.csv'), True),
+    'yearly_lynx_trapping': (lambda: bundled_dataset('yearly_lynx_trapping.csv'), True),
+    'monthly_air_passengers_with_frequency': (lambda: bundled_dataset('monthly_air_passengers.csv').asfreq('MS'), True),
+    'monthly_air_passengers_unparsed_dates': (lambda: bundled_dataset('monthly_air_passengers.csv', parse_dates=False), False),
+    'hourly': (lambda: pd.Series(np.cos(np.arange(24 * 7)), index=pd.date_range('2020-01-01', periods=24 * 7, freq='h')), True),
+    'weekly': (lambda: pd.Series(np.arange(120.), index=pd.date_range('2015-01-04', periods=120, freq='W-SUN')), True),
+    'gapped': (lambda: monthly_series().drop(monthly_series().index[10]), False),
+    'nan': (with_nan, False),
+    'reversed': (lambda: monthly_series().iloc[::-1], False),
+    'duplicated': (with_duplicated_date, False),
+    'short': (lambda: monthly_series(periods=20), False),
+    'short_daily': (lambda: pd.Series(np.arange(13.), index=pd.date_range('2020-01-01', periods=13, freq='D')), False),
+    'integer_index': (lambda: monthly_series().reset_index(drop=True), False),
+}
+
+def passes(validation, ts):
+    try:
+        validation(ts)
+        return True
+    except Exception:
+        return False
+
+@pytest.mark.parametrize('case', sorted(VALIDATION_CASES))
+def test_validation_decisions(case):
+    make_series, expected = VALIDATION_CASES[case]
+    assert passes(validate_time_series, make_series()) == expected
+
+@pytest.mark.filterwarnings('ignore')
+@pytest.mark.parametrize('case', sorted(VALIDATION_CASES))
+def test_validation_matches_baseline(case):
+    make_series, _ = VALIDATION_CASES[case]
+    assert passes(validate_time_series, make_series()) == passes(baseline_test_time_series, make_series())
+
+@pytest.mark.parametrize('file_name, frequency', [('daily_total_female_births.csv', 'Daily'), ('monthly_air_passengers.csv', 'Monthly'),
+                                                  ('monthly_wine_sales.csv', 'Monthly'), ('yearly_lynx_trapping.csv', 'Yearly')])
+def test_bundled_datasets_are_transformed(file_name, frequency):
+    df = pd.read_csv(os.path.join(DATASETS_FOLDER, file_name))
+    ds_column, y = df.columns
+    ts, missing_positions, _ = transform_time_series(df.copy(), ds_column, frequency, y)
+    assert len(missing_positions) == 0
+    assert len(ts) == len(df)
+    assert (ts[y].values == df[y].values).all()